@@ -3,8 +3,9 @@ from .mei_music_feature_processor import MEI_Music_Feature_Processor
 from .mei_metadata_processor import MEI_Metadata_Updater
 from .mei_metadata_extractor import MEI_Metadata_Extractor
 from .mei_metadata_updater_generic import MEI_Metadata_Updater_Generic
+from .mei_pipeline import MEI_Pipeline
 
 
 __package__ = __name__
-__version__ = "2.0.3"
+__version__ = "2.1.0"
 __author__ = "Richard Freedman"
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""
+mei_discovery.py
+================
+Finds the files a mei_tools entry point should work on.
+
+find_files() walks a folder with os.scandir and yields matching paths one
+at a time, so processing can begin while a large archive is still being
+listed.  The order is deterministic: the entries of each folder are taken
+in name order, the folder's own files first and then its subfolders.
+
+    # every MEI file below the archive, skipping earlier outputs
+    for path in find_mei_files('archive', recursive=True,
+                               extensions=MEI_EXTENSIONS,
+                               exclude=['*_rev.mei', 'drafts']):
+        ...
+
+The extractor, MEI_Metadata_Updater_Generic.process_folder() and
+MEI_Music_Feature_Processor.process_corpus() use find_mei_files() on the
+folder they are given (non-recursive *.mei, as before) and also accept
+such a generator, or any list of paths, in place of the folder.
+"""
+
+import os
+import fnmatch
+
+# Extensions recognised as MEI documents (gzip-compressed ones included)
+MEI_EXTENSIONS = ('.mei', '.xml', '.mei.gz')
+
+
+def _matches(relative_path, patterns):
+    return any(fnmatch.fnmatchcase(relative_path, pattern) for pattern in patterns)
+
+
+def find_files(folder, extensions, recursive=False, include=None, exclude=None):
+    """
+    Yield the paths of the files in *folder* whose names end with one of
+    *extensions*.
+
+    Parameters
+    ----------
+    folder : str
+        Folder to search.
+    extensions : str or sequence of str
+        File name endings to accept, e.g. '.mei' or ('.mid', '.midi');
+        compared case-insensitively.
+    recursive : bool
+        Also search all subfolders (symbolic links to folders are not
+        followed).
+    include : str or list of str, optional
+        Shell-style patterns; if given, a file is only yielded if its path
+        relative to *folder* (with '/' separators) matches one of them.
+    exclude : str or list of str, optional
+        Shell-style patterns for files to skip.  A subfolder whose relative
+        path matches one is not searched at all.
+
+    Names starting with '.' are skipped and a *folder* that does not
+    exist yields nothing, as with glob().
+    """
+    extensions = tuple(ext.lower() for ext in
+                       ([extensions] if isinstance(extensions, str) else extensions))
+    include = [include] if isinstance(include, str) else list(include or ())
+    exclude = [exclude] if isinstance(exclude, str) else list(exclude or ())
+    if not os.path.isdir(folder):
+        return
+    yield from _walk(folder, '', extensions, recursive, include, exclude)
+
+
+def _walk(folder, prefix, extensions, recursive, include, exclude):
+    with os.scandir(folder) as scan:
+        entries = sorted((entry for entry in scan if not entry.name.startswith('.')),
+                         key=lambda entry: entry.name)
+
+    subfolders = []
+    for entry in entries:
+        relative = prefix + entry.name
+        if entry.is_file():
+            if not entry.name.lower().endswith(extensions):
+                continue
+            if include and not _matches(relative, include):
+                continue
+            if exclude and _matches(relative, exclude):
+                continue
+            yield entry.path
+        elif recursive and entry.is_dir(follow_symlinks=False):
+            if not (exclude and _matches(relative, exclude)):
+                subfolders.append((entry.path, relative + '/'))
+
+    for path, relative in subfolders:
+        yield from _walk(path, relative, extensions, recursive, include, exclude)
+
+
+def find_mei_files(folder, recursive=False, extensions=('.mei',), include=None,
+                   exclude=None):
+    """find_files() with the *.mei default of the mei_tools entry points."""
+    return find_files(folder, extensions, recursive=recursive,
+                      include=include, exclude=exclude)
+
+
+def mei_file_stem(path):
+    """Return the file name of *path* without its MEI extension ('a.mei.gz' -> 'a')."""
+    name = os.path.basename(path)
+    for extension in sorted(MEI_EXTENSIONS, key=len, reverse=True):
+        if name.lower().endswith(extension):
+            return name[:-len(extension)]
+    return os.path.splitext(name)[0]
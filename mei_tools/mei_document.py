@@ -0,0 +1,89 @@
+"""
+mei_document.py
+===============
+A parsed MEI file that the mei_tools stages can hand to one another in
+memory.
+
+Each stage has a document method alongside its file-based one:
+
+    MEI_Metadata_Extractor.extract_document(doc)            -> metadata row
+    MEI_Metadata_Updater_Generic.update_document(doc, row)  -> doc
+    MEI_Metadata_Updater.update_document(doc, row)          -> doc (CRIM)
+    MEI_Music_Feature_Processor.process_document(doc)       -> doc
+
+so a score can be parsed once, passed through every stage and written
+once (see mei_pipeline.MEI_Pipeline), instead of being written to and
+re-read from the D_ and E_ folders in between.
+
+    doc = MEI_Document.from_file('A_mei_to_process/piece.mei')
+    updater.update_document(doc, row)
+    processor.process_document(doc, remove_incipit=False)
+    doc.write('E_mei_with_updated_music_features/piece_rev.mei')
+"""
+
+import os
+from lxml import etree
+
+from .mei_reader import parse_mei, parse_mei_bytes
+from .mei_writer import write_mei
+from .mei_discovery import mei_file_stem
+
+
+class MEI_Document:
+    """An MEI document held in memory: its <mei> root and the file it came from."""
+
+    def __init__(self, root, path=None):
+        self.root = root            # the lxml <mei> element, edited in place by the stages
+        self.path = path            # source file path, or None
+
+    def __repr__(self):
+        return f'MEI_Document({self.filename or None!r})'
+
+    @property
+    def filename(self):
+        """Base name of the source file ('' if unknown), as used to match CSV rows."""
+        return os.path.basename(self.path) if self.path else ''
+
+    @property
+    def stem(self):
+        """The file name without its MEI extension, e.g. 'piece' for 'piece.mei'."""
+        return mei_file_stem(self.path) if self.path else 'document'
+
+    @classmethod
+    def from_file(cls, path):
+        """Parse the MEI file *path* (UTF-8 or BOM-marked UTF-16, optionally .gz)."""
+        return cls(parse_mei(path), path)
+
+    @classmethod
+    def from_bytes(cls, data, path=None):
+        """Parse an MEI document held in *data*; *path* names it for CSV matching."""
+        return cls(parse_mei_bytes(data), path)
+
+    @classmethod
+    def from_tree(cls, tree, path=None):
+        """Wrap an already parsed lxml ElementTree or <mei> root element."""
+        root = tree.getroot() if isinstance(tree, etree._ElementTree) else tree
+        return cls(root, path)
+
+    @classmethod
+    def load(cls, source, path=None):
+        """
+        Return *source* as an MEI_Document: a document is returned as is,
+        bytes are parsed, a str or path-like is read from disk and an lxml
+        tree or element is wrapped.
+        """
+        if isinstance(source, MEI_Document):
+            return source
+        if isinstance(source, (bytes, bytearray)):
+            return cls.from_bytes(source, path)
+        if isinstance(source, (str, os.PathLike)):
+            return cls.from_file(os.fspath(source))
+        return cls.from_tree(source, path)
+
+    def to_bytes(self):
+        """Serialize the document as it stands, as UTF-8 with an XML declaration."""
+        return etree.tostring(self.root, encoding='utf-8', xml_declaration=True)
+
+    def write(self, output_path):
+        """Write the document to *output_path* as process_music_features() saves files."""
+        write_mei(self.root, output_path)
@@ -0,0 +1,84 @@
+"""
+mei_event_log.py
+================
+Message handling shared by the mei_tools processors.
+
+Every message a processor emits while working on a file goes through an
+MEI_Event_Log, which
+
+* records it in memory as a (level, message) event, so callers can
+  inspect what happened without any console output,
+* passes it to the standard 'mei_tools' logger, so applications can route
+  it with the logging module, and
+* while no logging handler is configured for that logger (or the root
+  logger), prints it to stdout when its level reaches the log's console
+  level (logging.INFO by default, None for a fully silent run).
+
+Once an application configures logging (e.g. logging.basicConfig()), the
+messages reach it through its handlers only and are not printed as well,
+so each one shows up once; the console level no longer applies and the
+logger's own levels decide what is shown.
+
+Per-element details (each tie chain, each modified syllable, …) are
+logged at DEBUG, so they are collected but not printed by default.
+
+Example:
+
+    import logging
+    processor = MEI_Music_Feature_Processor(log_level=None)   # silent
+    processor.process_music_features(mei_path, output_folder)
+    warnings = [msg for level, msg in processor.events if level >= logging.WARNING]
+"""
+
+import logging
+
+logger = logging.getLogger('mei_tools')
+# The library never configures output itself; see MEI_Event_Log.console_level
+logger.addHandler(logging.NullHandler())
+
+
+def _logging_configured():
+    """
+    Return True if a handler other than a NullHandler would receive the
+    'mei_tools' logger's records.
+    """
+    current = logger
+    while current is not None:
+        if any(not isinstance(handler, logging.NullHandler)
+               for handler in current.handlers):
+            return True
+        if not current.propagate:
+            break
+        current = current.parent
+    return False
+
+
+class MEI_Event_Log:
+    """Collects, logs and optionally prints the messages of one run."""
+
+    def __init__(self, console_level=logging.INFO):
+        # Lowest level echoed to stdout while logging is not configured,
+        # or None for no console output
+        self.console_level = console_level
+        # (level, message) tuples in the order they were emitted
+        self.events = []
+
+    def log(self, level, message):
+        """Record *message* at *level* (a logging level such as logging.INFO)."""
+        self.events.append((level, message))
+        logger.log(level, message)
+        if (self.console_level is not None and level >= self.console_level
+                and not _logging_configured()):
+            print(message)
+
+    def debug(self, message):
+        self.log(logging.DEBUG, message)
+
+    def info(self, message):
+        self.log(logging.INFO, message)
+
+    def warning(self, message):
+        self.log(logging.WARNING, message)
+
+    def error(self, message):
+        self.log(logging.ERROR, message)
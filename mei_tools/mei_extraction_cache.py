@@ -0,0 +1,137 @@
+"""
+mei_extraction_cache.py
+=======================
+On-disk cache of extracted metadata rows for MEI_Metadata_Extractor.
+
+save_csvs(..., use_cache=True) keeps a small SQLite database in the output
+folder that remembers, for every MEI file it has read, the extracted row
+together with the file's identity at the time:
+
+* the absolute path,
+* the size and modification time (st_size, st_mtime_ns), and
+* optionally a SHA-256 of the content (verify_hash=True).
+
+On the next run a file whose path, size and mtime are unchanged is not
+read again; its row comes straight from the database, so a run over a
+mostly static corpus costs little more than one os.stat() per file.
+With verify_hash=True, a file whose size or mtime did change is hashed
+before it is parsed: if its content is what was cached (it was only
+touched or copied over), the cached row is kept and its new size and
+mtime are recorded.
+
+Rows are cached separately for the generic and the CRIM schema.  Files
+that fail to extract are never cached, so they are retried every run.
+"""
+
+import os
+import json
+import hashlib
+import sqlite3
+
+# Bump whenever extracted rows change shape or content, so that rows
+# cached by an older version of the extractor are discarded
+CACHE_FORMAT = 1
+
+CACHE_FILENAME = '.mei_extraction_cache.sqlite'
+
+
+def _file_digest(filepath):
+    """Return the SHA-256 hex digest of the content of *filepath*."""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as fh:
+        for block in iter(lambda: fh.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class MEI_Extraction_Cache:
+    """SQLite store of extracted rows, keyed on file identity."""
+
+    def __init__(self, db_path, verify_hash=False):
+        """
+        Parameters
+        ----------
+        db_path : str
+            Path of the SQLite database; created if absent.
+        verify_hash : bool
+            When True, a file whose size or mtime changed keeps its cached
+            row if its SHA-256 still matches the one recorded with it.
+        """
+        self.db_path = db_path
+        self.verify_hash = verify_hash
+        # SHA-256 of the files hashed by lookup(), by identity, for store()
+        self._digests = {}
+        self.hits = 0
+        self.misses = 0
+        self._db = sqlite3.connect(db_path)
+        if self._db.execute('PRAGMA user_version').fetchone()[0] != CACHE_FORMAT:
+            self._db.execute('DROP TABLE IF EXISTS rows')
+            self._db.execute(f'PRAGMA user_version = {CACHE_FORMAT}')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS rows ('
+            ' path TEXT NOT NULL,'
+            ' mode TEXT NOT NULL,'          # 'generic' or 'crim'
+            ' size INTEGER NOT NULL,'
+            ' mtime_ns INTEGER NOT NULL,'
+            ' sha256 TEXT,'                 # only recorded with verify_hash
+            ' source_type TEXT,'
+            ' row TEXT NOT NULL,'           # the row dict as JSON
+            ' PRIMARY KEY (path, mode))')
+
+    def __repr__(self):
+        return (f'MEI_Extraction_Cache({self.db_path!r}, '
+                f'hits={self.hits}, misses={self.misses})')
+
+    def identity(self, filepath):
+        """Return the (path, size, mtime_ns) identity of *filepath*."""
+        path = os.path.abspath(filepath)
+        stat = os.stat(path)
+        return path, stat.st_size, stat.st_mtime_ns
+
+    def lookup(self, identity, mode):
+        """
+        Return the cached row for *identity* in *mode*, or None if stale or
+        absent.  May read the file, with verify_hash, so it can raise OSError.
+        """
+        path, size, mtime_ns = identity
+        found = self._db.execute(
+            'SELECT size, mtime_ns, sha256, row FROM rows WHERE path = ? AND mode = ?',
+            (path, mode)).fetchone()
+        if found is not None:
+            if found[0] == size and found[1] == mtime_ns:
+                self.hits += 1
+                return json.loads(found[3])
+            if self.verify_hash and found[2] is not None:
+                digest = self._digests[identity] = _file_digest(path)
+                if digest == found[2]:
+                    self._db.execute(
+                        'UPDATE rows SET size = ?, mtime_ns = ? WHERE path = ? AND mode = ?',
+                        (size, mtime_ns, path, mode))
+                    self.hits += 1
+                    return json.loads(found[3])
+        self.misses += 1
+        return None
+
+    def store(self, identity, mode, row):
+        """Record *row*, extracted from the file with *identity*, for *mode*."""
+        path, size, mtime_ns = identity
+        digest = None
+        if self.verify_hash:
+            digest = self._digests.pop(identity, None)
+            if digest is None:
+                try:
+                    digest = _file_digest(path)
+                except OSError:
+                    # cached without a hash; only size and mtime will match
+                    pass
+        self._db.execute(
+            'INSERT OR REPLACE INTO rows'
+            ' (path, mode, size, mtime_ns, sha256, source_type, row)'
+            ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (path, mode, size, mtime_ns, digest,
+             row.get('source_type'), json.dumps(row)))
+
+    def close(self):
+        """Commit the rows stored during this run and close the database."""
+        self._db.commit()
+        self._db.close()
@@ -0,0 +1,179 @@
+"""
+mei_feature_manifest.py
+=======================
+Manifest behind MEI_Music_Feature_Processor.process_corpus(incremental=True).
+
+An incremental run keeps .mei_tools_manifest.json in the output folder.
+For every <stem>_rev.mei it records:
+
+    input    the file it was made from
+    sha256   the content hash of that file
+    version  the mei_tools version that wrote it
+    format   the TRANSFORM_FORMAT of the transforms that wrote it
+    flags    the complete feature flag set, defaults included
+    active   the steps that were handed elements (every other step left
+             the file exactly as it found it)
+    tags     the transform tags (see mei_feature_transforms.TRANSFORMS)
+             present in the input or the output
+
+On the next run a file is skipped if its output still exists, its hash,
+the version and the transform format are unchanged, and every flag that differs from the
+recorded set belongs to a step that cannot have touched it: a step
+switched off that was handed no elements, or a step switched on whose
+tags occur neither in the input nor in the output.  Turning
+remove_lyrics on therefore reprocesses only the files with <verse>
+elements.
+
+Steps only create elements of tags that stay in the output (rests in
+correct_mrests, ties in slur_to_tie, supplied/accid in correct_ficta),
+which is what makes the 'tags' test safe.
+"""
+
+import os
+import json
+import hashlib
+import functools
+import tempfile
+
+from .mei_feature_transforms import TRANSFORMS, TRANSFORM_FORMAT
+
+MANIFEST_NAME = '.mei_tools_manifest.json'
+
+# Size of the blocks read while hashing an input file
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path):
+    """Return the hex SHA-256 of the file at *path*."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(CHUNK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def library_version():
+    """
+    Return the mei_tools version recorded with every entry: that of the
+    installed distribution, or mei_tools.__version__ when running from a
+    source tree that is not installed.
+    """
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+    except ImportError:
+        # Python 3.7 has no importlib.metadata
+        pass
+    else:
+        try:
+            return version('mei_tools')
+        except PackageNotFoundError:
+            pass
+    from . import __version__
+    return __version__
+
+
+def make_entry(mei_path, digest, flags, report, tags):
+    """
+    Return the manifest entry for a file just processed.
+
+    Parameters
+    ----------
+    mei_path : str
+        The input file.
+    digest : str
+        Its file_sha256().
+    flags : dict
+        The complete, normalized feature flag set used.
+    report : list of Transform_Report
+        The processor's report for the file.
+    tags : set of str
+        The transform tags present in the input or the output.
+    """
+    return {
+        'input': mei_path,
+        'sha256': digest,
+        'version': library_version(),
+        'format': TRANSFORM_FORMAT,
+        'flags': flags,
+        'active': sorted(r.name for r in report if r.visited),
+        'tags': sorted(tags),
+    }
+
+
+def entry_is_current(entry, digest, flags):
+    """
+    Return True if processing a file whose hash is *digest* with *flags*
+    would reproduce the output recorded by *entry*.
+    """
+    if (entry.get('sha256') != digest
+            or entry.get('version') != library_version()
+            or entry.get('format') != TRANSFORM_FORMAT):
+        return False
+    recorded = entry.get('flags', {})
+    active = set(entry.get('active', ()))
+    tags = set(entry.get('tags', ()))
+    for name, value in flags.items():
+        if recorded.get(name) == value:
+            continue
+        if name not in recorded or name not in TRANSFORMS:
+            return False
+        if recorded[name]:
+            # switched off: only harmless if the step found nothing to do
+            if name in active:
+                return False
+        elif tags.intersection(TRANSFORMS[name].tags):
+            # switched on, and the file has elements for it
+            return False
+    return True
+
+
+class Feature_Manifest:
+    """
+    The manifest of one output folder: entries keyed by output file name.
+
+    Parameters
+    ----------
+    output_folder : str
+        Folder holding the <stem>_rev.mei files and the manifest.
+    """
+
+    def __init__(self, output_folder):
+        self.path = os.path.join(output_folder, MANIFEST_NAME)
+        self.entries = {}
+
+    def __repr__(self):
+        return f'Feature_Manifest({self.path!r}, entries={len(self.entries)})'
+
+    @classmethod
+    def load(cls, output_folder):
+        """Read the manifest of *output_folder*; an absent or unreadable one is empty."""
+        manifest = cls(output_folder)
+        try:
+            with open(manifest.path, encoding='utf-8') as fh:
+                manifest.entries = json.load(fh)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as exc:
+            print(f'Ignoring unreadable manifest {manifest.path} ({exc}); '
+                  f'all files will be processed')
+        return manifest
+
+    def get(self, output_name):
+        """Return the entry recorded for *output_name*, or None."""
+        return self.entries.get(output_name)
+
+    def update(self, output_name, entry):
+        """Record *entry* for *output_name*, or forget it if *entry* is None."""
+        if entry is None:
+            self.entries.pop(output_name, None)
+        else:
+            self.entries[output_name] = entry
+
+    def save(self):
+        """Write the manifest, replacing the old one only when complete."""
+        folder = os.path.dirname(self.path) or '.'
+        with tempfile.NamedTemporaryFile('w', dir=folder, delete=False,
+                                         encoding='utf-8') as fh:
+            json.dump(self.entries, fh, indent=1, sort_keys=True)
+        os.replace(fh.name, self.path)
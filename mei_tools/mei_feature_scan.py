@@ -0,0 +1,284 @@
+"""
+mei_feature_scan.py
+===================
+Read-only QA scan behind MEI_Music_Feature_Processor.scan_corpus().
+
+Most music-feature steps only say what they found while they change the
+file, so triaging a corpus used to take a full, destructive run.  The
+scan instead runs a detector per feature on each file: the document is
+parsed and walked once (with route_elements(), as run_feature_steps()
+does), nothing is modified and nothing is written back.  Where a step
+picks what to change with more than a tag match, its detector calls the
+same selection helper from mei_feature_transforms, so the scan flags
+exactly what the step would change.
+
+Each detector is a Feature_Detector in DETECTORS, named after the
+feature it looks for and linked to the process_music_features() flag(s)
+that would act on it.  It returns one location per finding: the number
+of the enclosing measure, or an xml:id where there is no measure.
+
+    chords              <chord> elements (remove_chord, check_for_chords)
+    mrests_3_1          mRests in 3/1 measures (correct_mrests)
+    incipit             label="0" n="1" incipit measure (remove_incipit)
+    leuven_incipit      leading invisible incipit measures (remove_incipit_leuven)
+    variants            <app> apparatus (remove_variants)
+    slurs               <slur> elements (slur_to_tie)
+    ficta               red notes with an accidental (correct_ficta)
+    multibar_ties       tie chains spanning 3+ measures (resolve_multibar_ties)
+    empty_verses        <verse> without content in a <syllable> (remove_empty_verse)
+    elisions            <verse> with several <syl> (fix_elisions)
+    musescore_elisions  <syl con="b"> (fix_musescore_elisions)
+
+write_scan_report() saves the results of a scan as scan_report.json
+(every file with its locations, plus per-feature totals) and two CSVs:
+scan_files.csv (a row per file, a count column per feature) and
+scan_features.csv (a row per feature).
+"""
+
+import os
+import csv
+import json
+import time
+
+from .mei_document import MEI_Document
+from .mei_feature_transforms import (
+    route_elements, find_incipit, find_leuven_incipit, tie_chains,
+    measures_in_3_1, splittable_mrests, ficta_accid,
+)
+
+MEI_NS = 'http://www.music-encoding.org/ns/mei'
+XML_NS = 'http://www.w3.org/XML/1998/namespace'
+
+
+def _mei(tag):
+    """Return a Clark-notation MEI tag, e.g. '{http://...}note'."""
+    return f'{{{MEI_NS}}}{tag}'
+
+
+_NOTE = _mei('note')
+_MEASURE = _mei('measure')
+_SECTION = _mei('section')
+_SCORE_DEF = _mei('scoreDef')
+_VERSE = _mei('verse')
+_SYL = _mei('syl')
+_XML_ID = f'{{{XML_NS}}}id'
+
+# Names of the report files written by write_scan_report()
+REPORT_JSON = 'scan_report.json'
+FILES_CSV = 'scan_files.csv'
+FEATURES_CSV = 'scan_features.csv'
+
+
+class Feature_Detector:
+    """
+    A read-only check for one feature.
+
+    The handler is called as handler(elements) with the elements matching
+    *tags*, in document order, and returns a list with one location per
+    finding.  *flags* are the process_music_features() flags that act on
+    the feature.
+    """
+
+    def __init__(self, name, tags, flags, handler):
+        self.name = name
+        self.tags = tags
+        self.flags = flags
+        self.handler = handler
+
+    def __repr__(self):
+        return f'Feature_Detector({self.name!r})'
+
+
+# Registered detectors by feature name, in report order
+DETECTORS = {}
+
+
+def _detector(name, flags, *tags):
+    """Register *handler* as the detector for feature *name*, fed by *tags*."""
+    def register(handler):
+        DETECTORS[name] = Feature_Detector(name, tags, flags, handler)
+        return handler
+    return register
+
+
+def _where(element):
+    """Return the number of the measure holding *element*, or its xml:id."""
+    if element.tag == _MEASURE:
+        measure = element
+    else:
+        measure = next(element.iterancestors(_MEASURE), None)
+    if measure is not None and measure.get('n'):
+        return measure.get('n')
+    return (measure if measure is not None else element).get(_XML_ID) or ''
+
+
+# ----------------------------------------------------------------------
+# Detectors, sharing the selection logic of the matching steps
+# ----------------------------------------------------------------------
+
+@_detector('chords', ('remove_chord', 'check_for_chords'), _mei('chord'))
+def _find_chords(chords):
+    return [_where(chord) for chord in chords]
+
+
+@_detector('mrests_3_1', ('correct_mrests',), _SCORE_DEF, _MEASURE)
+def _find_mrests_3_1(elements):
+    return [_where(measure) for measure in measures_in_3_1(elements)
+            for _ in splittable_mrests(measure)]
+
+
+@_detector('incipit', ('remove_incipit',), _MEASURE)
+def _find_incipit(measures):
+    incipit = find_incipit(measures)
+    return [] if incipit is None else [_where(incipit)]
+
+
+@_detector('leuven_incipit', ('remove_incipit_leuven',), _SECTION)
+def _find_leuven_incipit(sections):
+    if not sections:
+        return []
+    leading_invis, following_score_def = find_leuven_incipit(sections[0])
+    if following_score_def is None:
+        return []
+    return [_where(measure) for measure in leading_invis]
+
+
+@_detector('variants', ('remove_variants',), _mei('app'))
+def _find_variants(apps):
+    return [_where(app) for app in apps]
+
+
+@_detector('slurs', ('slur_to_tie',), _mei('slur'))
+def _find_slurs(slurs):
+    return [_where(slur) for slur in slurs]
+
+
+@_detector('ficta', ('correct_ficta',), _NOTE)
+def _find_ficta(notes):
+    return [_where(note) for note in notes if ficta_accid(note) is not None]
+
+
+@_detector('multibar_ties', ('resolve_multibar_ties',), _mei('tie'))
+def _find_multibar_ties(ties):
+    return [_where(tie) for tie, chain, _ in tie_chains(ties) if len(chain) > 2]
+
+
+@_detector('empty_verses', ('remove_empty_verse',), _mei('syllable'))
+def _find_empty_verses(syllables):
+    return [_where(verse) for syllable in syllables
+            for verse in syllable.iterchildren(_VERSE) if not len(verse)]
+
+
+@_detector('elisions', ('fix_elisions',), _VERSE)
+def _find_elisions(verses):
+    found = []
+    for verse in verses:
+        syllables = verse.iter(_SYL)
+        if next(syllables, None) is not None and next(syllables, None) is not None:
+            found.append(_where(verse))
+    return found
+
+
+@_detector('musescore_elisions', ('fix_musescore_elisions',), _SYL)
+def _find_musescore_elisions(syllables):
+    return [_where(syl) for syl in syllables if syl.get('con') == 'b']
+
+
+# ----------------------------------------------------------------------
+# Scanning and reporting
+# ----------------------------------------------------------------------
+
+class Corpus_Scan_Result:
+    """What scan_corpus() found in one file."""
+
+    def __init__(self, mei_path):
+        self.mei_path = mei_path
+        self.status = 'ok'          # 'ok' or 'error'
+        self.error = None           # error message when status is 'error'
+        self.seconds = 0.0          # wall time for parsing and scanning
+        self.findings = {}          # feature name → list of locations
+
+    def counts(self):
+        """Return the number of findings per feature."""
+        return {name: len(locations) for name, locations in self.findings.items()}
+
+    def __repr__(self):
+        found = {name: n for name, n in self.counts().items() if n}
+        return (f'Corpus_Scan_Result({os.path.basename(self.mei_path)!r}, '
+                f'status={self.status!r}, findings={found})')
+
+
+def scan_root(root):
+    """
+    Run every detector on the <mei> element *root*, without changing it,
+    and return a dict of feature name → list of locations.
+    """
+    buckets, _ = route_elements(root, [d.tags for d in DETECTORS.values()])
+    return {name: detector.handler(buckets[detector.tags])
+            for name, detector in DETECTORS.items()}
+
+
+def scan_file(mei_path):
+    """Parse and scan one MEI file and return its Corpus_Scan_Result."""
+    result = Corpus_Scan_Result(mei_path)
+    started = time.perf_counter()
+    try:
+        result.findings = scan_root(MEI_Document.from_file(mei_path).root)
+    except Exception as e:
+        result.status = 'error'
+        result.error = f'{type(e).__name__}: {e}'
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def feature_totals(results):
+    """Return, per feature, its flags and how many files and findings it has."""
+    totals = {name: {'flags': list(detector.flags), 'files': 0, 'count': 0}
+              for name, detector in DETECTORS.items()}
+    for result in results:
+        for name, n in result.counts().items():
+            if n:
+                totals[name]['files'] += 1
+                totals[name]['count'] += n
+    return totals
+
+
+def write_scan_report(results, report_folder):
+    """
+    Write scan_report.json, scan_files.csv and scan_features.csv for the
+    Corpus_Scan_Results *results* to *report_folder* (created if absent)
+    and return the three paths.
+    """
+    os.makedirs(report_folder, exist_ok=True)
+    totals = feature_totals(results)
+    json_path = os.path.join(report_folder, REPORT_JSON)
+    files_path = os.path.join(report_folder, FILES_CSV)
+    features_path = os.path.join(report_folder, FEATURES_CSV)
+
+    report = {
+        'files': [{'file': result.mei_path,
+                   'status': result.status,
+                   'error': result.error,
+                   'seconds': round(result.seconds, 6),
+                   'features': {name: {'count': len(locations), 'locations': locations}
+                                for name, locations in result.findings.items()}}
+                  for result in results],
+        'features': totals,
+    }
+    with open(json_path, 'w', encoding='utf-8') as fh:
+        json.dump(report, fh, indent=1, ensure_ascii=False)
+
+    with open(files_path, 'w', encoding='utf-8', newline='') as fh:
+        writer = csv.writer(fh)
+        writer.writerow(['file', 'status', 'error'] + list(DETECTORS))
+        for result in results:
+            counts = result.counts()
+            writer.writerow([result.mei_path, result.status, result.error or '']
+                            + [counts.get(name, '') for name in DETECTORS])
+
+    with open(features_path, 'w', encoding='utf-8', newline='') as fh:
+        writer = csv.writer(fh)
+        writer.writerow(['feature', 'flags', 'files', 'count'])
+        for name, total in totals.items():
+            writer.writerow([name, ' '.join(total['flags']), total['files'], total['count']])
+    return json_path, files_path, features_path
@@ -0,0 +1,1075 @@
+"""
+mei_feature_transforms.py
+=========================
+Single-pass transform engine behind
+MEI_Music_Feature_Processor.process_music_features().
+
+Each music-feature correction (remove_pb, resolve_multibar_ties,
+correct_ficta, …) is a named Feature_Transform registered in TRANSFORMS:
+a handler function plus the element tags it works on.  Instead of every
+transform sweeping the whole document with its own findall()/xpath()
+call, run_feature_steps() walks the tree exactly once, routes every
+element to each enabled transform registered for its tag, and then runs
+the transforms in their historic order.  Every run yields one
+Transform_Report per transform (wall time, elements visited, elements
+changed).
+
+Because earlier steps may detach elements that were seen during the walk
+(e.g. a <dir> inside a removed <annot>, or <rdg> notes dropped by
+remove_variants), each step only receives the elements that are still
+attached to the document when it runs.  This keeps the output identical
+to the old one-sweep-per-flag implementation.
+"""
+
+import time
+import random
+import itertools
+from lxml import etree
+
+from .mei_event_log import MEI_Event_Log
+
+MEI_NS = 'http://www.music-encoding.org/ns/mei'
+XML_NS = 'http://www.w3.org/XML/1998/namespace'
+
+# Namespace map used by the per-step local lookups
+NS = {'mei': MEI_NS, 'xml': XML_NS}
+
+# Version of the transforms' output.  Increase it with every change that
+# makes any step write something different for the same input (incremental
+# process_corpus() runs record it, and redo every file when it changes).
+#   1  output of mei_tools 2.0.4 and earlier
+#   2  single-pass engine, id-derived correct_ficta ids (2.1.0)
+TRANSFORM_FORMAT = 2
+
+
+def _mei(tag):
+    """Return a Clark-notation MEI tag, e.g. '{http://...}note'."""
+    return f'{{{MEI_NS}}}{tag}'
+
+
+# Tags compared against inside the step handlers
+_NOTE = _mei('note')
+_TIE = _mei('tie')
+_SECTION = _mei('section')
+_SCORE_DEF = _mei('scoreDef')
+_MEASURE = _mei('measure')
+_DIR = _mei('dir')
+_SYL = _mei('syl')
+_MREST = _mei('mRest')
+_LAYER = _mei('layer')
+_ACCID = _mei('accid')
+_XML_ID = f'{{{XML_NS}}}id'
+
+
+class Feature_Transform:
+    """
+    One music-feature correction, named after its process_music_features()
+    flag.
+
+    The handler is called as handler(doc, elements) with the run's
+    MEI_Document_Context and the still-attached elements matching *tags*,
+    in document order.  It returns the number of elements it changed
+    (removed, inserted or modified).
+    """
+
+    def __init__(self, name, tags, handler):
+        self.name = name
+        self.tags = tags
+        self.handler = handler
+
+    def run(self, doc, elements):
+        """Apply the transform to *elements* and return its Transform_Report."""
+        started = time.perf_counter()
+        changed = self.handler(doc, elements)
+        return Transform_Report(self.name, time.perf_counter() - started,
+                                len(elements), changed or 0)
+
+    def __repr__(self):
+        return f'Feature_Transform({self.name!r})'
+
+
+class Transform_Report:
+    """What one transform did during one run."""
+
+    def __init__(self, name, seconds, visited, changed):
+        self.name = name
+        self.seconds = seconds      # wall time spent in the handler
+        self.visited = visited      # elements handed to the transform
+        self.changed = changed      # elements removed, inserted or modified
+
+    def __repr__(self):
+        return (f'Transform_Report({self.name!r}, seconds={self.seconds:.6f}, '
+                f'visited={self.visited}, changed={self.changed})')
+
+
+# Registered transforms by flag name.  The insertion order is the order
+# in which process_music_features() has always applied its corrections.
+TRANSFORMS = {}
+
+
+def _step(name, *tags):
+    """Register *handler* as the transform for flag *name*, fed by *tags*."""
+    def register(handler):
+        TRANSFORMS[name] = Feature_Transform(name, tags, handler)
+        return handler
+    return register
+
+
+class MEI_Document_Context:
+    """
+    Per-run state shared by every step working on one parsed MEI tree.
+
+    Steps that permanently remove an element go through detach() so the
+    engine knows which subtrees have left the document and can drop their
+    members from the element lists handed to later steps.  Elements that
+    are merely moved (remove_variants, collapse_layers) stay attached and
+    need no bookkeeping.
+
+    The context also owns the document's xml:id index, built on the first
+    element_by_id() / new_id() call and kept current by detach(),
+    insert() and register(), so steps never rescan the tree for ids.
+    """
+
+    def __init__(self, root, log=None):
+        self.root = root
+        # MEI_Event_Log receiving every message the steps emit
+        self.log = log if log is not None else MEI_Event_Log()
+        # Per-step statistics objects, keyed by flag name
+        self.stats = {}
+        # Transform_Report for every transform applied, in order
+        self.report = []
+        # Seconds spent in the shared tree walk
+        self.walk_seconds = 0.0
+        self._detached = []
+        self._dead = set()
+        self._ids = None
+        # Transform tags found in the document, when run with survey=True
+        self.tags_present = None
+        # Random numbers for steps that need them, seeded so that the
+        # same input always gives the same output
+        self.random = random.Random(0)
+
+    def _id_index(self):
+        """Return the xml:id → element index, building it on first use."""
+        if self._ids is None:
+            ids = {}
+            # as with a './/*[@xml:id=…]' find, the first element wins
+            for element in self.root.iter(etree.Element):
+                xml_id = element.get(_XML_ID)
+                if xml_id is not None and xml_id not in ids:
+                    ids[xml_id] = element
+            self._ids = ids
+        return self._ids
+
+    def element_by_id(self, xml_id):
+        """Return the attached element whose xml:id is *xml_id*, or None."""
+        return self._id_index().get(xml_id)
+
+    def new_id(self, make_id):
+        """
+        Return an xml:id not used anywhere in the document.
+
+        *make_id* is called until it yields an unused candidate; the id is
+        reserved at once, so ids requested back to back never collide.
+        """
+        ids = self._id_index()
+        xml_id = make_id()
+        while xml_id in ids:
+            xml_id = make_id()
+        ids[xml_id] = None
+        return xml_id
+
+    def register(self, element):
+        """Add the xml:ids of *element* and its descendants to the index."""
+        if self._ids is not None:
+            for el in element.iter():
+                xml_id = el.get(_XML_ID)
+                if xml_id and self._ids.get(xml_id) is None:
+                    self._ids[xml_id] = el
+
+    def insert(self, parent, index, element):
+        """parent.insert(index, element), keeping the xml:id index current."""
+        parent.insert(index, element)
+        self.register(element)
+
+    def detach(self, element):
+        """Remove *element* (and its tail) from its parent for good."""
+        element.getparent().remove(element)
+        self._detached.append(element)
+        if self._ids is not None:
+            for el in element.iter():
+                xml_id = el.get(_XML_ID)
+                if xml_id and self._ids.get(xml_id) is el:
+                    del self._ids[xml_id]
+
+    def detach_all(self, elements):
+        """detach() every element of the list *elements* and return how many there were."""
+        for element in elements:
+            self.detach(element)
+        return len(elements)
+
+    def live(self, elements):
+        """Return the members of *elements* that are still in the document."""
+        if self._detached:
+            for top in self._detached:
+                self._dead.update(top.iter())
+            self._detached = []
+        if not self._dead:
+            return list(elements)
+        dead = self._dead
+        return [el for el in elements if el not in dead]
+
+
+class MRest_Stats:
+    """Counters reported by the correct_mrests step."""
+
+    def __init__(self):
+        self.measures_scanned = 0   # 3/1 measures checked for mRests
+        self.mrests_split = 0       # mRests replaced by three breve rests
+
+    def __repr__(self):
+        return (f'MRest_Stats(measures_scanned={self.measures_scanned}, '
+                f'mrests_split={self.mrests_split})')
+
+
+def run_feature_steps(root, enabled, log=None, survey=False):
+    """
+    Apply every step whose flag is truthy in *enabled* to *root*, sending
+    their messages to the MEI_Event_Log *log* (a default one if None).
+
+    The tree is walked once to collect, in document order, the elements
+    each enabled step needs; the steps then run in registration order.
+    Steps asking for the same tags share one element list.
+
+    Returns the MEI_Document_Context used for the run.  Its *report* list
+    holds a Transform_Report per applied transform and its *stats* dict
+    any per-step statistics (e.g. MRest_Stats for correct_mrests).
+
+    With survey=True the walk also notes which tags of all registered
+    transforms, enabled or not, occur in the document, before or after
+    the steps; they are left in the context's *tags_present* set (used
+    by incremental process_corpus() runs).
+    """
+    transforms = [t for name, t in TRANSFORMS.items() if enabled.get(name)]
+    doc = MEI_Document_Context(root, log)
+
+    started = time.perf_counter()
+    surveyed = None
+    if survey:
+        surveyed = {tag for t in TRANSFORMS.values() for tag in t.tags}
+    buckets, tags_present = route_elements(
+        root, [transform.tags for transform in transforms], surveyed)
+    if survey:
+        doc.tags_present = tags_present
+    doc.walk_seconds = time.perf_counter() - started
+
+    for transform in transforms:
+        doc.report.append(transform.run(doc, doc.live(buckets[transform.tags])))
+
+    if survey:
+        # tags the steps created (rests, ties from slurs, ...)
+        missing = surveyed - doc.tags_present
+        if missing:
+            doc.tags_present.update(el.tag for el in root.iter(*missing))
+    return doc
+
+
+# ----------------------------------------------------------------------
+# Selection helpers, shared with the read-only detectors of mei_feature_scan
+# ----------------------------------------------------------------------
+
+def route_elements(root, tag_groups, surveyed=None):
+    """
+    Walk *root* once and collect, in document order, the elements of each
+    tuple of tags in *tag_groups*; equal tuples share one list.
+
+    Returns (buckets, tags_present): buckets maps each tuple to its list.
+    If *surveyed* (a set of tags) is given, the walk also covers those
+    tags and tags_present is the set of them found; otherwise it is None.
+    """
+    buckets = {}
+    routes = {}
+    for tags in tag_groups:
+        if tags not in buckets:
+            buckets[tags] = []
+            for tag in tags:
+                routes.setdefault(tag, []).append(buckets[tags])
+
+    tags_present = None
+    if surveyed is not None:
+        tags_present = set()
+        for el in root.iter(*surveyed):
+            tags_present.add(el.tag)
+            for bucket in routes.get(el.tag, ()):
+                bucket.append(el)
+    elif routes:
+        for el in root.iter(*routes):
+            for bucket in routes[el.tag]:
+                bucket.append(el)
+    return buckets, tags_present
+
+
+def find_incipit(measures):
+    """Return the label="0" n="1" incipit measure among *measures*, or None."""
+    return next((m for m in measures
+                 if m.get('label') == '0' and m.get('n') == '1'), None)
+
+
+def find_leuven_incipit(section):
+    """
+    Return (leading_invis, following_score_def) for the start of *section*.
+
+    The Leuven incipit is a run of right="invis" measures at the start of
+    the first section (pb and sb aside), followed immediately by a
+    scoreDef.  leading_invis lists those measures; following_score_def is
+    that scoreDef, or None when the run is not followed by one.
+    """
+    leading_invis = []
+    for child in section:
+        tag = child.tag.split('}')[-1] if isinstance(child.tag, str) else None
+        if tag in ('pb', 'sb'):
+            continue  # skip layout elements before the measures
+        elif tag == 'measure' and child.get('right') == 'invis':
+            leading_invis.append(child)
+        elif tag == 'scoreDef' and leading_invis:
+            return leading_invis, child
+        else:
+            break  # hit a normal measure — incipit is over
+    return leading_invis, None
+
+
+def tie_chains(ties):
+    """
+    Return the chains of notes linked by *ties*, as (tie, chain, circular)
+    tuples.
+
+    A chain starts at a startid that is never an endid and follows
+    startid → endid links ('#' stripped); *chain* lists its note ids and
+    *tie* is the <tie> starting it.  A chain that comes back to one of
+    its notes stops there with *circular* set.
+    """
+    # Build tie graph: startid → endid (strip leading '#')
+    tie_graph = {}
+    head_ties = {}
+    for tie in ties:
+        startid = (tie.get('startid') or '').lstrip('#')
+        endid   = (tie.get('endid')   or '').lstrip('#')
+        if startid and endid:
+            tie_graph[startid] = endid
+            head_ties[startid] = tie
+
+    # Chain heads: startids that are never themselves an endid
+    # Without this step, middle notes in a 3+ bar chain get 'i' instead of 'm'
+    all_endids = set(tie_graph.values())
+    chains = []
+    for head in tie_graph:
+        if head in all_endids:
+            continue
+        # Traverse the FULL chain before touching any note element
+        chain = [head]
+        current = head
+        visited = {head}
+        circular = False
+        while current in tie_graph:
+            nxt = tie_graph[current]
+            if nxt in visited:
+                circular = True
+                break
+            chain.append(nxt)
+            visited.add(nxt)
+            current = nxt
+        chains.append((head_ties[head], chain, circular))
+    return chains
+
+
+def measures_in_3_1(elements, log=None):
+    """
+    Yield the measures with an xml:id that a 3/1 meter applies to, from
+    the scoreDef and measure *elements* in document order.
+
+    A scoreDef with meter.count="3" meter.unit="1" starts a 3/1 context;
+    any other scoreDef with meter attributes ends it.
+    """
+    in_3_1 = False
+    for element in elements:
+        if element.tag == _SCORE_DEF:
+            meter_count = element.get('meter.count')
+            meter_unit = element.get('meter.unit')
+            if meter_count == '3' and meter_unit == '1':
+                in_3_1 = True
+                if log is not None:
+                    log.debug(f"Found scoreDef with meter.count=3 and meter.unit=1")
+            elif meter_count is not None or meter_unit is not None:
+                # Any other scoreDef with meter attributes resets our context
+                in_3_1 = False
+            continue
+        if in_3_1 and element.get(_XML_ID):
+            yield element
+
+
+def splittable_mrests(measure):
+    """
+    Return (mrest, layer) for each mRest of *measure* that correct_mrests
+    splits: those with an xml:id, inside a layer (the nearest one).
+    """
+    found = []
+    for mrest in measure.iter(_MREST):
+        layer = mrest.getparent()
+        while layer is not None and not layer.tag.endswith('layer'):
+            layer = layer.getparent()
+        if layer is not None and mrest.get(_XML_ID):
+            found.append((mrest, layer))
+    return found
+
+
+def ficta_accid(note):
+    """
+    Return the <accid> of *note* if correct_ficta marks it as supplied
+    (a note with @color and an accid child), otherwise None.
+    """
+    if note.get('color') is None:
+        return None
+    return note.find(_ACCID)
+
+
+# ----------------------------------------------------------------------
+# Steps, in application order
+# ----------------------------------------------------------------------
+
+@_step('remove_incipit', _mei('measure'))
+def _remove_incipit(doc, measures):
+    # Find measure with label="0" and n="1"
+    incipit = find_incipit(measures)
+    if incipit is None:
+        return 0
+
+    # Remove measure
+    changed = 0
+    parent = incipit.getparent()
+    if parent is not None:
+        doc.detach(incipit)
+        changed += 1
+        doc.log.info("Measure removed successfully!")
+
+        # Renumber remaining measures starting at 1
+        doc.log.info("\nRenumbering measures...")
+        remaining = (m for m in measures if m is not incipit)
+        for idx, measure in enumerate(remaining, 1):  # Start enumeration at 1
+            # Set both n and label to match the current position
+            new_number = str(idx)
+            measure.set('n', new_number)
+            measure.set('label', new_number)
+            changed += 1
+    return changed
+
+
+@_step('remove_incipit_leuven', _mei('section'), _mei('scoreDef'), _mei('measure'))
+def _remove_incipit_leuven(doc, elements):
+    # The Leuven incipit consists of two leading right="invis" measures at the
+    # start of the first section, followed immediately by a scoreDef.
+    # Other right="invis" measures appear throughout the piece (invisible barlines)
+    # and must NOT be removed, so we walk the section children from the top
+    # rather than searching the whole document.
+    section = next((e for e in elements if e.tag == _SECTION), None)
+
+    if section is None:
+        doc.log.info("No section found for Leuven incipit removal.")
+        return 0
+
+    leading_invis, following_score_def = find_leuven_incipit(section)
+
+    changed = 0
+    if not leading_invis:
+        doc.log.info("No invisible incipit measures found for Leuven incipit removal.")
+    elif following_score_def is None:
+        doc.log.info("No scoreDef found after invisible measures.")
+    else:
+        # Step 2: Capture meter values from the scoreDef after the incipit
+        meter_count = following_score_def.get('meter.count')
+        meter_unit = following_score_def.get('meter.unit')
+        doc.log.info(f"Found meter.count={meter_count}, meter.unit={meter_unit} from scoreDef after invisible measures.")
+
+        # Step 3: Remove that scoreDef
+        doc.detach(following_score_def)
+        changed += 1
+        doc.log.info("Removed scoreDef after invisible measures.")
+
+        # Step 4: Update the very first scoreDef of the piece
+        first_score_def = next((e for e in elements
+                                if e.tag == _SCORE_DEF and e is not following_score_def), None)
+        if first_score_def is not None and meter_count and meter_unit:
+            first_score_def.set('meter.count', meter_count)
+            first_score_def.set('meter.unit', meter_unit)
+            changed += 1
+            doc.log.info(f"Updated first scoreDef with meter.count={meter_count}, meter.unit={meter_unit}.")
+
+        # Step 5: Remove the leading invisible measures
+        for invis_measure in leading_invis:
+            doc.detach(invis_measure)
+        changed += len(leading_invis)
+        doc.log.info(f"Removed {len(leading_invis)} invisible incipit measure(s).")
+
+        # Renumber all remaining measures starting from 1
+        # and remove any remaining right="invis" attributes
+        removed = set(leading_invis)
+        measures = [e for e in elements
+                    if e.tag == _MEASURE and e not in removed]
+        doc.log.info("Renumbering measures and removing invis barline attributes...")
+        for idx, measure in enumerate(measures, 1):
+            new_number = str(idx)
+            measure.set('n', new_number)
+            measure.set('label', new_number)
+            if measure.get('right') == 'invis':
+                del measure.attrib['right']
+        changed += len(measures)
+    return changed
+
+
+@_step('remove_pb', _mei('pb'))
+def _remove_pb(doc, pb_elements):
+    count = len(pb_elements)
+    doc.log.info(f"Found {count} page breaks to remove.")
+    doc.detach_all(pb_elements)
+    return count
+
+
+@_step('remove_sb', _mei('sb'))
+def _remove_sb(doc, sb_elements):
+    count = len(sb_elements)
+    doc.log.info(f"Found {count} section breaks to remove.")
+    doc.detach_all(sb_elements)
+    return count
+
+
+@_step('remove_annotation', _mei('annot'))
+def _remove_annotation(doc, annotations):
+    count = len(annotations)
+    doc.log.info(f"Found {count} annotations to remove.")
+    doc.detach_all(annotations)
+    return count
+
+
+@_step('resolve_multibar_ties', _mei('tie'))
+def _resolve_multibar_ties(doc, ties):
+    chains = tie_chains(ties)
+    if not chains:
+        doc.log.info("  No <tie> elements found, skipping tie resolution.")
+        return 0
+
+    chains_found = 0
+    multibar_found = 0
+    changed = 0
+
+    for _, chain, circular in chains:
+        if circular:
+            doc.log.warning(f"  Warning: circular tie detected at {chain[-1]}, breaking.")
+
+        chains_found += 1
+        if len(chain) > 2:
+            multibar_found += 1
+            doc.log.debug(f"  Multi-bar chain ({len(chain)} notes): {' -> '.join(chain)}")
+
+        # Assign @tie="i"/"m"/"t" based on position in full chain
+        for i, node_id in enumerate(chain):
+            # Notes are looked up in the document's shared xml:id index
+            note_elem = doc.element_by_id(node_id)
+            if note_elem is not None and note_elem.tag != _NOTE:
+                note_elem = None
+            if note_elem is None:
+                doc.log.warning(f"  Warning: no note found for xml:id='{node_id}'")
+                continue
+            if len(chain) == 2:
+                attr = 'i' if i == 0 else 't'
+            elif i == 0:
+                attr = 'i'
+            elif i == len(chain) - 1:
+                attr = 't'
+            else:
+                attr = 'm'  # MEI 'continue': middle of a 3+ bar chain
+            note_elem.set('tie', attr)
+            changed += 1
+
+    doc.log.info(f"  Tie resolution: {chains_found} chains processed, "
+          f"{multibar_found} spanning 3+ measures.")
+    return changed
+
+
+@_step('remove_dir', _mei('dir'))
+def _remove_dir(doc, dir_elements):
+    count = len(dir_elements)
+    doc.log.info(f"Found {count} direction elements to remove.")
+    doc.detach_all(dir_elements)
+    return count
+
+
+@_step('remove_ligature_bracket', _mei('bracketSpan'))
+def _remove_ligature_bracket(doc, bracket_elements):
+    count = len(bracket_elements)
+    doc.log.info(f"Found {count} ligatures to remove.")
+    doc.detach_all(bracket_elements)
+    return count
+
+
+@_step('remove_variants', _mei('app'))
+def _remove_variants(doc, apps):
+    count = len(apps)
+    doc.log.info(f"Found {count} variants to correct.")
+    changed = 0
+    for app in apps:
+        # Get the parent layer
+        app_parent_layer = app.getparent()
+
+        # Find all lem elements containing notes
+        lems = app.findall('.//mei:lem', namespaces=NS)
+
+        # Move notes to parent layer
+        for lem in lems:
+            notes = lem.findall('.//mei:note', namespaces=NS)
+            for note in notes:
+                # Remove note from current position
+                lem.remove(note)
+                # Add note to parent layer
+                app_parent_layer.append(note)
+                changed += 1
+
+        # Remove all rdg elements
+        rdgs = app.findall('.//mei:rdg', namespaces=NS)
+        for rdg in rdgs:
+            doc.detach(rdg)
+        changed += len(rdgs)
+
+        # Finally, remove the app element itself
+        doc.detach(app)
+        changed += 1
+    return changed
+
+
+@_step('remove_anchored_text', _mei('anchoredText'))
+def _remove_anchored_text(doc, anchored):
+    # remove the anchors that still have a parent to remove them from
+    attached = [anchor for anchor in anchored if anchor.getparent() is not None]
+    for _ in attached:
+        doc.log.debug("Anchored text removed successfully!")
+    return doc.detach_all(attached)
+
+
+@_step('remove_timestamp', _mei('note'), _mei('rest'), _mei('mRest'), _mei('tie'))
+def _remove_timestamp(doc, elements):
+    doc.log.info('Checking and Removing timestamp.')
+    # Not etree.strip_attributes(): it clears the names on every element,
+    # and tempo, dir, line, chord and space keep their tstamp attributes
+    changed = 0
+    for el in elements:
+        if el.tag == _TIE:
+            # Remove tstamp2 from ties for Verovio compatibility
+            names = ('tstamp', 'tstamp2')
+        else:
+            # Remove timestamp and velocity from notes, rests and mRests
+            names = ('tstamp.real', 'vel')
+        modified = False
+        for name in names:
+            if el.get(name) is not None:
+                del el.attrib[name]
+                modified = True
+        changed += modified
+    return changed
+
+
+@_step('correct_cmme_time_signatures', _mei('scoreDef'))
+def _correct_cmme_time_signatures(doc, score_defs):
+    # add time signature information to all scoreDefs (for CMME and JRP)
+    count = len(score_defs)
+    doc.log.info(f"Found {count} scoreDef elements to process.")
+
+    changed = 0
+    for score_def in score_defs:
+        # Find the first staffDef in this scoreDef
+        first_staff_def = score_def.find('.//mei:staffDef', namespaces=NS)
+
+        if first_staff_def is not None:
+            # Get meter attributes from first staffDef
+            meter_count = first_staff_def.get('meter.count')
+            meter_unit = first_staff_def.get('meter.unit')
+
+            if meter_count and meter_unit:
+                # Add meter attributes to scoreDef
+                score_def.set('meter.count', meter_count)
+                score_def.set('meter.unit', meter_unit)
+
+                # Remove meter attributes from all staffDefs in this scoreDef
+                staff_defs = score_def.findall('.//mei:staffDef', namespaces=NS)
+                for staff_def in staff_defs:
+                    staff_def.attrib.pop('meter.count', None)
+                    staff_def.attrib.pop('meter.unit', None)
+                changed += 1 + len(staff_defs)
+    return changed
+
+
+@_step('correct_jrp_time_signatures', _mei('scoreDef'))
+def _correct_jrp_time_signatures(doc, score_defs):
+    # add time signature information to scoreDef for JRP meterSig codings
+    count = len(score_defs)
+    doc.log.info(f"Found {count} scoreDef elements to process.")
+
+    changed = 0
+    for score_def in score_defs:
+        meterSig = score_def.find('.//mei:meterSig', namespaces=NS)
+
+        if meterSig is not None:
+            meter_count = meterSig.get('count')
+            meter_unit = meterSig.get('unit')
+
+            if meter_count and meter_unit:
+                # Add meter attributes to scoreDef
+                score_def.set('meter.count', meter_count)
+                score_def.set('meter.unit', meter_unit)
+                changed += 1
+    return changed
+
+
+@_step('correct_mrests', _mei('scoreDef'), _mei('measure'))
+def _correct_mrests(doc, elements):
+    # fix mrests under 3/1
+    stats = doc.stats['correct_mrests'] = MRest_Stats()
+
+    # 3/1 measures to process, keyed by xml:id in document order
+    measures_to_process = {measure.get(_XML_ID): True
+                           for measure in measures_in_3_1(elements, doc.log)}
+
+    doc.log.info(f"Found {len(measures_to_process)} 3/1 measures check for mRests.")
+
+    # Process each identified measure
+    for measure_id in measures_to_process:
+        # the document's xml:id index replaces a './/measure[@xml:id=…]' find
+        measure = doc.element_by_id(measure_id)
+        if measure is None or measure.tag != _MEASURE:
+            continue
+        stats.measures_scanned += 1
+
+        # Find the identified mRest elements in this measure and their layers
+        for mrest, layer in splittable_mrests(measure):
+            # lxml keeps parent links current as rests are inserted and
+            # removed, so no separate child → parent map is needed
+            parent = mrest.getparent()
+
+            # Get the original mRest ID
+            mrest_id = mrest.get(_XML_ID)
+
+            # Find the index where we should insert the new rests
+            if parent is layer:
+                insert_index = layer.index(mrest)
+            else:
+                insert_index = len(layer)
+
+            # Create multiple rest elements
+            for i in range(3):
+                # Create a new rest element and set attributes
+                rest = etree.Element(_mei('rest'))
+                rest.set(_XML_ID, f"{mrest_id}{chr(97 + i)}")
+                rest.set('dur', '1')
+                rest.set('dur.ppq', '1024')
+
+                # Insert the rest into the layer
+                doc.insert(layer, insert_index + i, rest)
+
+            # Remove the original mRest from its parent
+            doc.detach(mrest)
+            stats.mrests_split += 1
+    doc.log.info(f"Corrected {stats.mrests_split} mRests")
+    # each split removes one mRest and inserts three rests
+    return 4 * stats.mrests_split
+
+
+@_step('remove_chord', _mei('chord'))
+def _remove_chord(doc, chords):
+    count = len(chords)
+    doc.log.info(f"Found {count} chord elements to remove.")
+
+    doc.detach_all(chords)
+    return count
+
+
+@_step('check_for_chords', _mei('chord'))
+def _check_for_chords(doc, chords):
+    for chord in chords:
+        parent = chord.getparent()
+        measure_number = parent.get('n')
+
+        doc.log.info(f"Chord element found in measure {measure_number}" )
+    return 0
+
+
+@_step('remove_senfl_bracket', _mei('line'))
+def _remove_senfl_bracket(doc, lines):
+    # Remove Senfl edition brackets
+    brackets = [line for line in lines if line.get('type') == 'bracket']
+    count = len(brackets)
+    doc.log.info(f"Found {count} bracket elements to remove.")
+    doc.detach_all(brackets)
+    return count
+
+
+@_step('remove_empty_verse', _mei('syllable'))
+def _remove_empty_verse(doc, syllables):
+    # Find all parent elements that might contain verses
+    changed = 0
+    for parent in syllables:
+        # Find all verses within this parent
+        verses = parent.findall('mei:verse', namespaces=NS)
+        # Create a list of verses to keep
+        verses_to_keep = []
+        for verse in verses:
+            if list(verse):  # If verse has children
+                verses_to_keep.append(verse)
+
+        # If we found empty verses, clear the parent and add back only non-empty verses
+        if len(verses_to_keep) < len(verses):
+            # Remove all verses from parent
+            for verse in verses:
+                if verse in verses_to_keep:
+                    parent.remove(verse)
+                else:
+                    doc.detach(verse)
+            # Add back only non-empty verses
+            for verse in verses_to_keep:
+                parent.append(verse)
+            changed += len(verses) - len(verses_to_keep)
+    return changed
+
+
+@_step('remove_lyrics', _mei('verse'))
+def _remove_lyrics(doc, verses):
+    count = len(verses)
+    doc.log.info(f"Found {count} lyric elements to remove.")
+    doc.detach_all(verses)
+    return count
+
+
+@_step('fix_elisions', _mei('verse'))
+def _fix_elisions(doc, verses):
+    changed = 0
+    for verse in verses:
+        # Set all v numbers to 1
+        if verse.get('n') != '1':
+            verse.set('n', '1')
+            changed += 1
+
+        # Find all syl elements
+        syllables = list(verse.iter(_SYL))
+
+        # Check if there are more than one syl elements
+        if len(syllables) > 1:
+            doc.log.debug(f"Found elided syllables to correct.")
+
+            # Get the text of the first and second syllables
+            first_syllable = syllables[0].text or ""
+            second_syllable = syllables[1].text or ""
+
+            # Concatenate the text with "=" as separator
+            new_text = f"{first_syllable}={second_syllable}"
+
+            # Update the text of the first syllable
+            syllables[0].text = new_text
+
+            # Set attributes for the first syllable
+            syllables[0].set('con', 'd')
+            syllables[0].set('wordpos', 'm')
+
+            # Remove the second syllable
+            doc.detach(syllables[1])
+            changed += 2
+    return changed
+
+
+@_step('fix_musescore_elisions', _mei('syl'))
+def _fix_musescore_elisions(doc, syllables):
+    # check for syllables with con="b" (which are the elided ones)
+    sylls_to_fix = [syl for syl in syllables if syl.get('con') == 'b']
+    doc.log.info(f"Found {len(sylls_to_fix)} elided syllables to correct in Musescore MEI.")
+    if not sylls_to_fix:
+        return 0
+
+    # One ordered pass builds each layer's syllable sequence.  Like
+    # ancestor::mei:layer[1] in document order, a syllable belongs to its
+    # outermost layer ancestor; syllables outside any layer map to None.
+    outer_layer = {}
+    layer_syllables = {}
+    position = {}
+    for syllable in syllables:
+        layer = _outermost_layer(syllable.getparent(), outer_layer)
+        sequence = layer_syllables.setdefault(layer, [])
+        position[syllable] = len(sequence)
+        sequence.append(syllable)
+
+    # change con="b" to con="d" and wordpos="m" so the first syllable is correct
+    changed = len(sylls_to_fix)
+    for syllable in sylls_to_fix:
+        syllable.set('con', 'd')
+        syllable.set('wordpos', 'm')
+
+        # Now modify the next syllable in the same layer, which is the one with the real elision
+        layer = outer_layer[syllable.getparent()]
+        if layer is None:
+            doc.log.warning(f"Warning: No layer ancestor found for syllable {syllable.get('xml:id')}")
+            continue
+
+        sequence = layer_syllables[layer]
+        next_index = position[syllable] + 1
+        if next_index < len(sequence):
+            next_syl = sequence[next_index]
+            if next_syl.text and len(next_syl.text) > 1:
+                original = next_syl.text
+                # replace the combining breve if present (which is \u035c) with underscore
+                next_syl.text = next_syl.text.replace("\u035c", "_")
+                changed += 1
+                doc.log.debug(f"Modified: '{original}' → '{next_syl.text}'")
+    return changed
+
+
+def _outermost_layer(element, memo):
+    """
+    Return the outermost <layer> among *element* and its ancestors.
+
+    *memo* maps already-resolved elements to their answer, so resolving
+    every syllable of a layer visits each ancestor only once.
+    """
+    path = []
+    node = element
+    while node is not None and node not in memo:
+        path.append(node)
+        node = node.getparent()
+    layer = memo[node] if node is not None else None
+    for node in reversed(path):
+        if layer is None and node.tag == _LAYER:
+            layer = node
+        memo[node] = layer
+    return layer
+
+
+@_step('slur_to_tie', _mei('slur'))
+def _slur_to_tie(doc, slurs):
+    # Replace slurs with ties
+    count = len(slurs)
+    doc.log.info(f"Found {count} slurs to correct as ties.")
+    for slur in slurs:
+        # Remove specific attributes
+        for attr in ['layer', 'tstamp', 'tstamp2', 'staff']:
+            if attr in slur.attrib:
+                del slur.attrib[attr]
+
+        # Change element name to 'tie'
+        slur.tag = _mei('tie')
+    return count
+
+
+@_step('collapse_layers', _mei('staff'))
+def _collapse_layers(doc, staves):
+    changed = 0
+    for staff in staves:
+        layers = staff.findall('.//mei:layer', namespaces=NS)
+        for layer in layers:
+            if layer.get('n') != '1':  # Only process non-layer-1 elements
+                target_layer = staff.find('.//mei:layer[@n="1"]', namespaces=NS)
+                if target_layer is not None:
+                    if layer.text or len(layer) > 0:  # Check for any content
+                        # Move all children to target layer
+                        children = list(layer)
+                        for child in children:
+                            target_layer.append(child)
+                        # Remove the empty layer
+                        doc.detach(layer)
+                        changed += len(children) + 1
+    return changed
+
+
+@_step('correct_ficta', 'dir', _mei('dir'), _mei('note'))
+def _correct_ficta(doc, elements):
+    # remove 'dir' tags - both with and without namespace
+    dir_tags = [el for el in elements if el.tag in ('dir', _DIR)]
+    doc.log.info(f"Found {len(dir_tags)} dir tags to remove")
+    for tag in dir_tags:
+        doc.detach(tag)
+    changed = len(dir_tags)
+
+    # correct red accidental notes as supplied
+    color_notes = [el for el in elements
+                   if el.tag == _NOTE and el.get('color') is not None]
+    color_count = len(color_notes)
+    doc.log.info(f"Found {color_count} total color notes to correct as supplied.")
+
+    for note in color_notes:
+        accid = ficta_accid(note)
+
+        if accid is not None:
+            # Handle accid.ges attributes
+            if 'accid.ges' in accid.attrib:
+                accid.set('accid', accid.get('accid.ges'))
+                del accid.attrib['accid.ges']
+
+            # Remove color attribute
+            del note.attrib['color']
+
+            # Get accid value
+            accid_value = accid.get('accid')
+
+            # Derive IDs from the note's, so re-runs give the same bytes
+            supplied_id = doc.new_id(_ficta_id(doc, note, 'supplied'))
+            accid_id = doc.new_id(_ficta_id(doc, note, 'accid'))
+
+            # Create new supplied parent tag
+            supplied_tag = etree.SubElement(
+                note,
+                'supplied',
+                attrib={
+                    'reason': 'edit',
+                    f'{{{XML_NS}}}id': supplied_id  # Use Clark notation for xml:id
+                }
+            )
+
+            # Update the accid tag creation
+            etree.SubElement(
+                supplied_tag,
+                'accid',
+                attrib={
+                    'accid': accid_value,
+                    'func': "edit",
+                    'place': "above",
+                    f'{{{XML_NS}}}id': accid_id  # Use Clark notation for xml:id
+                }
+            )
+            doc.register(supplied_tag)
+
+            # Replace old accid tag with new structure
+            doc.detach(accid)
+            # note modified, accid removed, supplied and new accid inserted
+            changed += 4
+    return changed
+
+
+def _ficta_id(doc, note, role):
+    """
+    Return a new_id() candidate maker for the *role* element correct_ficta
+    adds to *note*: '<note id>-<role>', then '-2', '-3', … on a clash.
+    Notes without an xml:id get 'm-NNNNNNN' ids from the seeded doc.random.
+    """
+    note_id = note.get(_XML_ID)
+    if not note_id:
+        return lambda: f"m-{doc.random.randint(1000000, 9999999)}"
+    base = f"{note_id}-{role}"
+    candidates = itertools.chain([base], (f"{base}-{n}" for n in itertools.count(2)))
+    return candidates.__next__
+
+
+@_step('voice_labels', _mei('staffDef'))
+def _voice_labels(doc, staffDefs):
+    # revert staffDef/label to staffDef/@label
+    count = len(staffDefs)
+    doc.log.info(f"Found {count} staff labels to correct.")
+
+    changed = 0
+    for staffDef in staffDefs:
+        label_elem = staffDef.find('mei:label', namespaces=NS)
+        if label_elem is not None and label_elem.text:
+            staffDef.set('label', label_elem.text)
+            changed += 1
+    return changed
@@ -0,0 +1,244 @@
+"""
+mei_head_splicer.py
+===================
+Saves a metadata update by splicing the edited meiHead into the original
+file instead of re-serializing the whole document.
+
+The metadata updaters only change meiHead (and, for the CRIM updater, a
+couple of attributes on the root <mei> tag).  Rewriting a multi-MB score
+for that means parsing, re-indenting and serializing every measure.  With
+splicing:
+
+1. find_head_span() scans just the start of the file for the byte
+   offsets of the root start tag and of <meiHead>…</meiHead>;
+2. the caller parses only the header (parse_mei(..., header_only=True))
+   and edits it;
+3. write_spliced_mei() writes the original bytes up to the header, the
+   newly serialized (and re-indented) meiHead, and the original bytes
+   after it, copied from a memory-mapped view of the input.
+
+The XML declaration, any processing instructions or comments before the
+root, the file's encoding (UTF-8, US-ASCII or BOM-marked UTF-16) and the
+formatting of the music body are all preserved byte for byte; in an ASCII
+file, header characters outside ASCII are written as character references.  The root start tag is
+only re-serialized if its attributes were changed.
+"""
+
+import re
+import mmap
+import gzip
+import codecs
+from lxml import etree
+
+# Characters decoded per step while looking for the end of meiHead
+SCAN_CHARS = 64 * 1024
+
+# One markup token: comment, CDATA, PI/XML declaration, doctype, or tag
+_TOKEN = re.compile(r'''
+      <!--.*?-->
+    | <!\[CDATA\[.*?\]\]>
+    | <\?.*?\?>
+    | <!DOCTYPE(?:[^\[>]|\[.*?\])*>
+    | <(?P<end>/)?(?P<name>[^\s/>!?][^\s/>]*)(?:[^>"']|"[^"]*"|'[^']*')*>
+''', re.S | re.X)
+
+# The encoding named in a leading XML declaration
+_DECLARED_ENCODING = re.compile(r'''^\s*<\?xml[^>]*?\bencoding\s*=\s*["']([^"']*)''')
+
+# Declared encodings that can be spliced, and the codec each is written in.
+# An ASCII file gets character references for anything outside ASCII.
+_DECLARED_CODECS = {'UTF-8': 'utf-8', 'UTF8': 'utf-8',
+                    'US-ASCII': 'ascii', 'ASCII': 'ascii'}
+
+
+class Head_Span:
+    """Where the root start tag and meiHead lie in an MEI file."""
+
+    def __init__(self, codec, root_tag, head, indent):
+        self.codec = codec          # codec of the file body, e.g. 'utf-8', 'ascii' or 'utf-16-le'
+        self.root_tag = root_tag    # (start, end) byte offsets of the root start tag
+        self.head = head            # (start, end) byte offsets of <meiHead>…</meiHead>
+        self.indent = indent        # whitespace before <meiHead> on its line, or None
+
+    def __repr__(self):
+        return f'Head_Span(codec={self.codec!r}, root_tag={self.root_tag}, head={self.head})'
+
+
+def _open_buffer(filepath):
+    """Return (buffer, closer) giving the raw bytes of *filepath*."""
+    if filepath.lower().endswith('.gz'):
+        with gzip.open(filepath, 'rb') as fh:
+            data = fh.read()
+        return data, lambda: None
+    fh = open(filepath, 'rb')
+    try:
+        data = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:
+        # Empty files cannot be mapped
+        data = b''
+
+    def close():
+        if isinstance(data, mmap.mmap):
+            data.close()
+        fh.close()
+    return data, close
+
+
+def _codec(data):
+    """Return (codec, BOM length) for the file starting with *data*, or None."""
+    if data[:2] == codecs.BOM_UTF16_LE:
+        return 'utf-16-le', 2
+    if data[:2] == codecs.BOM_UTF16_BE:
+        return 'utf-16-be', 2
+    if data[:3] == codecs.BOM_UTF8:
+        return 'utf-8', 3
+    declaration = _DECLARED_ENCODING.match(data[:200].decode('ascii', 'replace'))
+    if declaration is None:
+        return 'utf-8', 0
+    codec = _DECLARED_CODECS.get(declaration.group(1).upper())
+    if codec is None:
+        return None
+    return codec, 0
+
+
+def find_head_span(filepath):
+    """
+    Locate the root start tag and the meiHead element of *filepath*.
+
+    Only the file's prologue and header are decoded and scanned.  Returns
+    a Head_Span, or None if the file is in an encoding other than UTF-8,
+    US-ASCII or BOM-marked UTF-16 (or its prologue and header do not decode
+    in it), or if no meiHead child of the root is found.
+
+    Parameters
+    ----------
+    filepath : str
+        Path of the MEI file.
+    """
+    data, close = _open_buffer(filepath)
+    try:
+        found = _codec(data)
+        if found is None:
+            return None
+        codec, bom = found
+        decoder = codecs.getincrementaldecoder(codec)()
+        text = ''
+        read_to = bom
+        pos = depth = 0
+        root_tag = head_start = None
+
+        while True:
+            match = _TOKEN.search(text, pos)
+            if match is None or match.start() != text.find('<', pos):
+                # The next token is not complete yet: decode some more
+                if read_to >= len(data):
+                    return None
+                block = data[read_to:read_to + SCAN_CHARS]
+                read_to += len(block)
+                try:
+                    text += decoder.decode(block, final=read_to >= len(data))
+                except UnicodeDecodeError:
+                    # Not in its declared encoding; leave it to a full rewrite
+                    return None
+                continue
+            pos = match.end()
+            name = match.group('name')
+            if name is None:
+                continue
+            local = name.rpartition(':')[2]
+            if match.group('end'):
+                depth -= 1
+                if depth == 1 and head_start is not None and local == 'meiHead':
+                    head = (head_start, match.end())
+                    break
+                if depth == 0:
+                    return None
+                continue
+            empty = text[match.end() - 2] == '/'
+            if depth == 0:
+                root_tag = (match.start(), match.end())
+            elif depth == 1 and local == 'meiHead':
+                head_start = match.start()
+                if empty:
+                    head = (match.start(), match.end())
+                    break
+            if not empty:
+                depth += 1
+            if depth == 0:
+                # An empty root element: nothing to splice into
+                return None
+
+        line = text[text.rfind('\n', 0, head[0]) + 1:head[0]]
+        indent = line if '\n' in text[:head[0]] and not line.strip() else None
+
+        def offset(index):
+            return bom + len(text[:index].encode(codec))
+        return Head_Span(codec,
+                         (offset(root_tag[0]), offset(root_tag[1])),
+                         (offset(head[0]), offset(head[1])),
+                         indent)
+    finally:
+        close()
+
+
+def _head_markup(root, head, indent):
+    """Serialize *head* as it should appear inside *root*."""
+    if indent is not None:
+        etree.indent(head, space=indent, level=1)
+    markup = etree.tostring(head, encoding='unicode', with_tail=False)
+    # tostring() repeats the namespaces in scope on the head's start tag;
+    # drop the ones the root already declares
+    tag_end = markup.index('>')
+    start_tag = markup[:tag_end]
+    for prefix, uri in root.nsmap.items():
+        attribute = 'xmlns' if prefix is None else f'xmlns:{prefix}'
+        start_tag = start_tag.replace(f' {attribute}="{uri}"', '', 1)
+    return start_tag + markup[tag_end:]
+
+
+def _root_tag_markup(root, original):
+    """Return the root start tag to write: *original* unless root's attributes changed."""
+    qualified_name = re.match(r'<([^\s/>]+)', original).group(1)
+    parsed = etree.fromstring(original + '</' + qualified_name + '>')
+    if dict(parsed.attrib) == dict(root.attrib) and parsed.nsmap == root.nsmap:
+        return None
+    bare = etree.Element(root.tag, attrib=dict(root.attrib), nsmap=root.nsmap)
+    # Serialized empty, '<mei .../>'; reopen it
+    return etree.tostring(bare, encoding='unicode')[:-2] + '>'
+
+
+def write_spliced_mei(filepath, span, root, output_path):
+    """
+    Write *filepath* to *output_path* with its meiHead replaced by the
+    meiHead of *root* (an edited header-only parse of the same file).
+
+    Parameters
+    ----------
+    filepath : str
+        Path of the original MEI file.
+    span : Head_Span
+        Its layout, from find_head_span().
+    root : lxml.etree._Element
+        The edited <mei> root; only its attributes and meiHead are used.
+    output_path : str
+        Path of the file to (over)write.
+    """
+    head = root.find('{http://www.music-encoding.org/ns/mei}meiHead')
+    data, close = _open_buffer(filepath)
+    try:
+        view = memoryview(data)
+        original_tag = bytes(view[span.root_tag[0]:span.root_tag[1]]).decode(span.codec)
+        root_markup = _root_tag_markup(root, original_tag)
+        head_markup = _head_markup(root, head, span.indent)
+        with open(output_path, 'wb') as out:
+            if root_markup is None:
+                out.write(view[:span.head[0]])
+            else:
+                out.write(view[:span.root_tag[0]])
+                out.write(root_markup.encode(span.codec, 'xmlcharrefreplace'))
+                out.write(view[span.root_tag[1]:span.head[0]])
+            out.write(head_markup.encode(span.codec, 'xmlcharrefreplace'))
+            out.write(view[span.head[1]:])
+        view.release()
+    finally:
+        close()
@@ -0,0 +1,74 @@
+"""
+mei_header_compare.py
+=====================
+Tells the metadata updaters whether an update would change anything.
+
+With skip_unchanged=True, MEI_Metadata_Updater_Generic and
+MEI_Metadata_Updater compare the header they are about to write with the
+one in the existing <stem>_rev.mei.  If the output is newer than its
+input file and both headers are the same, nothing is written, so the
+output keeps its modification time and later incremental steps (or an
+rsync deploy) leave it alone.
+
+Headers are compared semantically: the root attributes and the meiHead
+subtree in canonical form, ignoring indentation and the run timestamps
+the updaters add (the *volatile* attributes).
+"""
+
+import os
+from copy import deepcopy
+from lxml import etree
+
+from .mei_reader import parse_mei
+
+MEI_NS = 'http://www.music-encoding.org/ns/mei'
+NAMESPACES = {'mei': MEI_NS}
+
+
+def header_signature(root, volatile=()):
+    """
+    Return the canonical bytes of *root*'s attributes and meiHead.
+
+    Parameters
+    ----------
+    root : lxml.etree._Element
+        An <mei> root, parsed in full or header-only.
+    volatile : sequence of (str, str)
+        (XPath relative to the root, attribute name) pairs whose values
+        are left out, e.g. the isodate of an updater's appInfo stamp.
+        Paths use the 'mei' prefix.
+    """
+    shell = etree.Element(root.tag, attrib=dict(root.attrib), nsmap=root.nsmap)
+    head = root.find('mei:meiHead', namespaces=NAMESPACES)
+    if head is not None:
+        shell.append(deepcopy(head))
+    # Round-trip through text so elements created without a namespace
+    # compare as they will be read back from the written file
+    header = etree.fromstring(etree.tostring(shell))
+    for element in header.iter():
+        if element.text is not None and not element.text.strip():
+            element.text = None
+        if element.tail is not None and not element.tail.strip():
+            element.tail = None
+    for path, attribute in volatile:
+        for element in header.xpath(path, namespaces=NAMESPACES):
+            element.attrib.pop(attribute, None)
+    return etree.tostring(header, method='c14n2')
+
+
+def output_is_current(input_path, root, output_path, volatile=()):
+    """
+    Return True if *output_path* already holds what updating *input_path*
+    into *root* would write.
+
+    That is the case when the output exists, was written after the input
+    was last modified (so the music body is the same), and its header has
+    the same header_signature() as *root*.
+    """
+    try:
+        if os.stat(output_path).st_mtime_ns < os.stat(input_path).st_mtime_ns:
+            return False
+        existing = parse_mei(output_path, header_only=True)
+    except (OSError, etree.XMLSyntaxError):
+        return False
+    return header_signature(existing, volatile) == header_signature(root, volatile)
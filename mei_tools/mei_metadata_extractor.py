@@ -1,8 +1,16 @@
 import os
-import csv
-import glob
+import itertools
+import collections
+import multiprocessing
 from lxml import etree
 
+from .mei_reader import parse_mei
+from .mei_document import MEI_Document
+from .mei_discovery import find_mei_files
+from .mei_source_type import detect_source_type
+from .mei_extraction_cache import MEI_Extraction_Cache, CACHE_FILENAME
+from .mei_metadata_writers import EXTENSIONS, get_writer, rows_to_dataframe
+
 # ---------------------------------------------------------------------------
 # Shared column order for all extracted CSVs.
 # The updater reads these same columns back when applying changes.
@@ -74,28 +82,41 @@ CRIM_CSV_COLUMNS = [
     'Publisher_2_VIAF',
 ]
 
+# ---------------------------------------------------------------------------
+# Header lookups.  Every document-level search is anchored at meiHead and
+# compiled once here, so a missing element costs a walk of the header only,
+# never of the whole score.  Each XPath returns a list in document order;
+# _first() gives the find()-style first match.  MEI_Metadata_Updater_Generic
+# imports the ones it needs.
+# ---------------------------------------------------------------------------
+_XPATH_NS = {
+    'mei': 'http://www.music-encoding.org/ns/mei',
+    'hum': 'http://www.humdrum.org/ns/humxml',
+}
 
-def _read_mei_bytes(filepath):
-    """
-    Read an MEI file and return its content as UTF-8 bytes.
 
-    Sibelius exports are UTF-16 (with a BOM).  We detect the BOM, decode to
-    a Python string, rewrite the XML declaration's encoding attribute, then
-    re-encode as UTF-8 so lxml can parse it normally.  All other files are
-    returned unchanged.
-    """
-    with open(filepath, 'rb') as fh:
-        raw = fh.read()
+def _head_xpath(path):
+    """Compile *path* as a search below the meiHead child of the root."""
+    return etree.XPath(f'mei:meiHead//{path}', namespaces=_XPATH_NS)
+
 
-    # UTF-16 BOM: 0xFF 0xFE (little-endian) or 0xFE 0xFF (big-endian)
-    if raw[:2] in (b'\xff\xfe', b'\xfe\xff'):
-        text = raw.decode('utf-16')
-        # Update the XML declaration so lxml sees consistent encoding info
-        text = text.replace('encoding="UTF-16"', 'encoding="UTF-8"')
-        text = text.replace("encoding='UTF-16'", "encoding='UTF-8'")
-        raw = text.encode('utf-8')
+_ENCODING_APPLICATIONS = _head_xpath('mei:encodingDesc/mei:appInfo/mei:application')
+_HUM_META_FRAMES       = _head_xpath('hum:metaFrame')
+_WORK                  = _head_xpath('mei:workList/mei:work')
+_MANIFESTATION_LIST    = _head_xpath('mei:manifestationList')
+_TITLES                = _head_xpath('mei:fileDesc/mei:titleStmt/mei:title')
+_TITLE_COMPOSER        = _head_xpath('mei:fileDesc/mei:titleStmt/mei:composer')
+_TITLE_PERSNAMES       = _head_xpath('mei:fileDesc/mei:titleStmt/mei:respStmt/mei:persName')
+_PUB_STMT              = _head_xpath('mei:fileDesc/mei:pubStmt')
+_PUB_PERSNAMES         = _head_xpath('mei:fileDesc/mei:pubStmt/mei:respStmt/mei:persName')
+_USE_RESTRICT          = _head_xpath('mei:fileDesc/mei:pubStmt/mei:availability/mei:useRestrict')
+_SOURCE_BIBL           = _head_xpath('mei:fileDesc/mei:sourceDesc/mei:source/mei:bibl')
 
-    return raw
+
+def _first(xpath, root):
+    """Return the first element *xpath* selects from *root*, or None."""
+    found = xpath(root)
+    return found[0] if found else None
 
 
 class MEI_Metadata_Extractor:
@@ -122,7 +143,8 @@ class MEI_Metadata_Extractor:
     MEI_NS = 'http://www.music-encoding.org/ns/mei'
     HUM_NS = 'http://www.humdrum.org/ns/humxml'
 
-    def __init__(self, verbose=False, crim_mode=False):
+    def __init__(self, verbose=False, crim_mode=False, header_only=False,
+                 use_cache=False, verify_hash=False):
         """
         Parameters
         ----------
@@ -135,15 +157,36 @@ class MEI_Metadata_Extractor:
             MEI_Metadata_Updater.apply_metadata().  All files in the
             corpus go into one CSV called crim_extracted_metadata.csv
             rather than being split by source type.
+        header_only : bool
+            When True, each file is parsed incrementally and parsing stops
+            at the closing </meiHead> tag, so the music body is never read
+            or parsed.  Every extracted field comes from meiHead (and the
+            root's meiversion), so the rows are the same as with a full
+            parse; metadata sweeps over large scores become I/O-bound.
+        use_cache : bool
+            When True, save_csvs() keeps the extracted rows in a SQLite
+            database (.mei_extraction_cache.sqlite) in the output folder
+            and only re-extracts files that are new or whose size or
+            modification time changed since the last run.
+        verify_hash : bool
+            With use_cache, also record a SHA-256 of each file's content.
+            A file whose size or mtime changed is then hashed, and keeps
+            its cached row (without being parsed) if its content did not
+            change, e.g. after a touch or a copy.
         """
         self.verbose = verbose
         self.crim_mode = crim_mode
+        self.header_only = header_only
+        self.use_cache = use_cache
+        self.verify_hash = verify_hash
+        # Extraction_Error for every file the last save_csvs() run could not read
+        self.errors = []
 
     # ------------------------------------------------------------------
     # Public interface
     # ------------------------------------------------------------------
 
-    def save_csvs(self, input_folder, output_folder):
+    def save_csvs(self, input_folder, output_folder, workers=1):
         """
         Process every .mei file in *input_folder* and write CSV(s) into
         *output_folder*.
@@ -156,61 +199,164 @@ class MEI_Metadata_Extractor:
 
         Parameters
         ----------
-        input_folder : str
-            Folder containing MEI files (searched non-recursively).
+        input_folder : str or iterable of str
+            Folder containing MEI files (searched non-recursively), or the
+            MEI file paths themselves, e.g. a lazy
+            mei_discovery.find_mei_files(folder, recursive=True).
         output_folder : str
             Folder where CSV files will be written.  Created if absent.
+        workers : int or None, optional
+            Number of worker processes used to extract the files (default 1,
+            i.e. one file after another in this process; None means one per
+            CPU).  Rows are always written in sorted filename order, so the
+            CSVs are the same whatever the number of workers.
+
+        Files that cannot be read are skipped; afterwards self.errors holds
+        one Extraction_Error (file path and error message) for each of them.
+
+        To write JSONL, Parquet or Arrow files as well as (or instead of)
+        CSV, see save_metadata().
+        """
+        self.save_metadata(input_folder, output_folder, formats='csv', workers=workers)
+
+    def save_metadata(self, input_folder, output_folder, formats='csv', workers=1):
+        """
+        Like save_csvs(), but writes the rows in one or more *formats*.
+
+        Each format produces the same files as the CSV output (one per
+        source type, or crim_extracted_metadata in CRIM mode), with the
+        same columns, under the format's own extension.
+
+        Parameters
+        ----------
+        input_folder : str or iterable of str
+            Folder containing MEI files (searched non-recursively), or the
+            MEI file paths themselves, e.g. a lazy
+            mei_discovery.find_mei_files(folder, recursive=True).
+        output_folder : str
+            Folder where the files will be written.  Created if absent.
+        formats : str or list of str
+            Any of 'csv', 'jsonl', 'parquet' and 'arrow' (Arrow IPC).
+            Parquet and Arrow need the optional pyarrow package.
+        workers : int or None, optional
+            Number of worker processes, as for save_csvs().
+
+        Example:
+
+        extractor = MEI_Metadata_Extractor()
+        extractor.save_metadata('A_mei_to_process', 'B_extracted_metadata_csv',
+                                formats=['csv', 'parquet'])
         """
+        formats = [formats] if isinstance(formats, str) else list(formats)
+        # Fail before extracting anything if a format cannot be written
+        for output_format in formats:
+            get_writer(output_format)
         os.makedirs(output_folder, exist_ok=True)
 
+        cache = None
+        if self.use_cache:
+            cache = MEI_Extraction_Cache(os.path.join(output_folder, CACHE_FILENAME),
+                                         verify_hash=self.verify_hash)
+        try:
+            if self.crim_mode:
+                self._save_crim_csv(input_folder, output_folder, formats, workers, cache)
+            else:
+                self._save_generic_csvs(input_folder, output_folder, formats, workers, cache)
+        finally:
+            if cache is not None:
+                cache.close()
+                if self.verbose:
+                    print(f'Reused {cache.hits} cached row(s), extracted {cache.misses} file(s)')
+
+    def to_dataframe(self, input_folder, workers=1):
+        """
+        Extract every .mei file in *input_folder* (a folder or file paths,
+        as for save_csvs()) and return the rows as a pandas DataFrame
+        (needs pandas), in file order.
+
+        The columns are CSV_COLUMNS (with a source_type column telling the
+        files apart), or CRIM_CSV_COLUMNS in CRIM mode.
+        """
+        columns = CRIM_CSV_COLUMNS if self.crim_mode else CSV_COLUMNS
+        return rows_to_dataframe(self._extract_rows(self._mei_files(input_folder), workers),
+                                 columns)
+
+    def extract_document(self, document):
+        """
+        Return the metadata row of one document held in memory.
+
+        *document* is an mei_document.MEI_Document, or anything
+        MEI_Document.load() accepts (bytes, an lxml tree or root, a path);
+        its file name fills the filename (or MEI_Name) column.  The row
+        uses CRIM_CSV_COLUMNS in CRIM mode and CSV_COLUMNS otherwise.
+        """
+        document = MEI_Document.load(document)
         if self.crim_mode:
-            self._save_crim_csv(input_folder, output_folder)
-            return
+            return self._extract_crim_row(document.root, document.filename)
+        return self._extract_root(document.root, document.filename)
 
-        grouped = self._process_folder(input_folder)
+    def save_rows(self, rows, output_folder, formats='csv'):
+        """
+        Write rows that were already extracted, e.g. with
+        extract_document(), to *output_folder*, split into files and named
+        as save_metadata() does.
+        """
+        formats = [formats] if isinstance(formats, str) else list(formats)
+        for output_format in formats:
+            get_writer(output_format)
+        os.makedirs(output_folder, exist_ok=True)
+        if self.crim_mode:
+            self._write_rows(list(rows), CRIM_CSV_COLUMNS, output_folder,
+                             'crim_extracted_metadata.csv', formats)
+            return
+        grouped = {}
+        for row in rows:
+            grouped.setdefault(row['source_type'], []).append(row)
+        self._write_grouped(grouped, output_folder, formats)
+
+    def _write_rows(self, rows, columns, output_folder, csv_name, formats):
+        """Write *rows* to *output_folder* once per format, named after *csv_name*."""
+        stem = os.path.splitext(csv_name)[0]
+        for output_format in formats:
+            path = os.path.join(output_folder, stem + EXTENSIONS[output_format])
+            get_writer(output_format)(rows, columns, path)
+            print(f'Saved {len(rows)} row(s) → {path}')
+
+    def _save_generic_csvs(self, input_folder, output_folder, formats=('csv',),
+                           workers=1, cache=None):
+        """Extract generic-schema metadata into one file per source type and format."""
+        grouped = self._process_folder(input_folder, workers, cache)
 
         if not grouped:
             print('No MEI files found in', input_folder)
             return
 
+        self._write_grouped(grouped, output_folder, formats)
+
+    def _write_grouped(self, grouped, output_folder, formats):
+        """Write generic-schema rows grouped by source type, one file per type and format."""
         for source_type, rows in grouped.items():
             csv_name = SOURCE_TYPE_FILENAMES.get(source_type,
                                                   f'{source_type}_extracted_metadata.csv')
-            csv_path = os.path.join(output_folder, csv_name)
-            with open(csv_path, 'w', newline='', encoding='utf-8') as fh:
-                writer = csv.DictWriter(fh, fieldnames=CSV_COLUMNS)
-                writer.writeheader()
-                writer.writerows(rows)
-            print(f'Saved {len(rows)} row(s) → {csv_path}')
+            self._write_rows(rows, CSV_COLUMNS, output_folder, csv_name, formats)
 
     # ------------------------------------------------------------------
     # CRIM mode: single CSV with CRIM column names
     # ------------------------------------------------------------------
 
-    def _save_crim_csv(self, input_folder, output_folder):
-        """Extract CRIM-schema metadata from all MEI files in one CSV."""
-        mei_files = sorted(glob.glob(os.path.join(input_folder, '*.mei')))
-        if not mei_files:
+    def _save_crim_csv(self, input_folder, output_folder, formats=('csv',),
+                       workers=1, cache=None):
+        """Extract CRIM-schema metadata from all MEI files in one file per format."""
+        mei_files = self._mei_files(input_folder)
+        first = next(mei_files, None)
+        if first is None:
             print('No MEI files found in', input_folder)
             return
 
-        rows = []
-        for filepath in mei_files:
-            if self.verbose:
-                print(f'Processing {os.path.basename(filepath)} …')
-            try:
-                raw  = _read_mei_bytes(filepath)
-                root = etree.fromstring(raw)
-                rows.append(self._extract_crim_row(root, os.path.basename(filepath)))
-            except Exception as exc:
-                print(f'  ERROR processing {os.path.basename(filepath)}: {exc}')
-
-        csv_path = os.path.join(output_folder, 'crim_extracted_metadata.csv')
-        with open(csv_path, 'w', newline='', encoding='utf-8') as fh:
-            writer = csv.DictWriter(fh, fieldnames=CRIM_CSV_COLUMNS)
-            writer.writeheader()
-            writer.writerows(rows)
-        print(f'Saved {len(rows)} row(s) → {csv_path}')
+        rows = list(self._extract_rows(itertools.chain([first], mei_files), workers, cache))
+
+        self._write_rows(rows, CRIM_CSV_COLUMNS, output_folder,
+                         'crim_extracted_metadata.csv', formats)
 
     def _extract_crim_row(self, root, filename):
         """
@@ -264,7 +410,7 @@ class MEI_Metadata_Extractor:
             row['Editor'] = '|'.join(editors)
 
         # Also check workList/work/composer for composer if not yet found
-        work = root.find('.//mei:workList/mei:work', namespaces=ns)
+        work = _first(_WORK, root)
         if work is not None and not row['Composer_Name']:
             wc = work.find('mei:composer', namespaces=ns)
             if wc is not None:
@@ -298,7 +444,7 @@ class MEI_Metadata_Extractor:
             )
 
         # ---- manifestationList (present after a previous CRIM run) ---
-        mf_list = root.find('.//mei:manifestationList', namespaces=ns)
+        mf_list = _first(_MANIFESTATION_LIST, root)
         if mf_list is not None:
             mf = mf_list.find('mei:manifestation', namespaces=ns)
             if mf is not None:
@@ -335,36 +481,108 @@ class MEI_Metadata_Extractor:
     # Internal: folder scan
     # ------------------------------------------------------------------
 
-    def _process_folder(self, input_folder):
+    @staticmethod
+    def _mei_files(input_folder):
+        """
+        Return an iterator over the files to extract: the .mei files in
+        *input_folder*, or the paths themselves if it is a list or iterator
+        of paths (such as find_mei_files(folder, recursive=True)).
+        """
+        if isinstance(input_folder, (str, os.PathLike)):
+            return find_mei_files(input_folder)
+        return iter(input_folder)
+
+    def _process_folder(self, input_folder, workers=1, cache=None):
         """
         Scan *input_folder* for .mei files, extract metadata, and return a
         dict keyed by source_type, each value being a list of row dicts.
         """
-        mei_files = sorted(glob.glob(os.path.join(input_folder, '*.mei')))
-        if not mei_files:
-            return {}
-
         grouped = {}
-        for filepath in mei_files:
-            if self.verbose:
-                print(f'Processing {os.path.basename(filepath)} …')
-            try:
-                row = self._extract_file(filepath)
-                stype = row['source_type']
-                grouped.setdefault(stype, []).append(row)
-            except Exception as exc:
-                print(f'  ERROR processing {os.path.basename(filepath)}: {exc}')
+        for row in self._extract_rows(self._mei_files(input_folder), workers, cache):
+            grouped.setdefault(row['source_type'], []).append(row)
 
         return grouped
 
+    def _extract_rows(self, mei_files, workers=1, cache=None):
+        """
+        Yield the row of every readable file in *mei_files*, in the order
+        given, extracting them in a pool of *workers* processes.  Files that
+        fail are recorded in self.errors instead.  With a *cache*, rows of
+        unchanged files are taken from it and only the others are extracted.
+
+        *mei_files* may be a lazy iterator (e.g. find_mei_files()): files are
+        handed out as they are found, with a few per worker queued ahead.
+        """
+        self.errors = []
+        mode = 'crim' if self.crim_mode else 'generic'
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if isinstance(mei_files, (list, tuple)):
+            workers = min(workers, len(mei_files))
+        pool = multiprocessing.Pool(workers) if workers > 1 else None
+        window = workers * 4 if pool is not None else 0
+
+        # Files in input order: (cache identity, from cache?, outcome or pending result)
+        pending = collections.deque()
+        try:
+            for filepath in mei_files:
+                identity = row = outcome = None
+                if cache is not None:
+                    try:
+                        identity = cache.identity(filepath)
+                        row = cache.lookup(identity, mode)
+                    except OSError as exc:
+                        # recorded in self.errors, like a file that fails to parse
+                        outcome = (filepath, None, f'{type(exc).__name__}: {exc}')
+                if row is not None:
+                    outcome = (filepath, row, None)
+                elif outcome is None:
+                    job = (filepath, self.crim_mode, self.header_only)
+                    outcome = (_extract_job(job) if pool is None
+                               else pool.apply_async(_extract_job, (job,)))
+                pending.append((identity, row is not None, outcome))
+                while len(pending) > window:
+                    yield from self._collect_row(*pending.popleft(), cache, mode)
+            while pending:
+                yield from self._collect_row(*pending.popleft(), cache, mode)
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+        if self.errors:
+            print(f'{len(self.errors)} file(s) could not be read; see .errors for details')
+
+    def _collect_row(self, identity, from_cache, outcome, cache, mode):
+        """Yield the row of one file from _extract_rows(), or record its error."""
+        if not isinstance(outcome, tuple):
+            outcome = outcome.get()
+        filepath, row, error = outcome
+        if from_cache:
+            yield row
+            return
+        if self.verbose:
+            print(f'Processing {os.path.basename(filepath)} …')
+        if error is None:
+            if cache is not None:
+                cache.store(identity, mode, row)
+            yield row
+        else:
+            self.errors.append(Extraction_Error(filepath, error))
+
     # ------------------------------------------------------------------
     # Internal: single-file extraction
     # ------------------------------------------------------------------
 
+    def _parse(self, filepath):
+        """Return the root of *filepath*, parsed in full or up to meiHead."""
+        return parse_mei(filepath, header_only=self.header_only)
+
     def _extract_file(self, filepath):
-        raw = _read_mei_bytes(filepath)
-        root = etree.fromstring(raw)
-        filename = os.path.basename(filepath)
+        return self._extract_root(self._parse(filepath), os.path.basename(filepath))
+
+    def _extract_root(self, root, filename):
+        """Extract the generic-schema row of a parsed file."""
         source_type = self._detect_source_type(root)
 
         dispatch = {
@@ -394,51 +612,11 @@ class MEI_Metadata_Extractor:
           4. musescore   – application name contains "MuseScore", or
                            meiversion contains "basic"
           5. unknown
-        """
-        ns = {'mei': self.MEI_NS}
-
-        app_names = []
-        app_ids = []
-        p_texts = []
-
-        for app in root.findall('.//mei:appInfo/mei:application', namespaces=ns):
-            xml_id = app.get(f'{{{self.MEI_NS.replace(self.MEI_NS, "http://www.w3.org/XML/1998/namespace")}}}id', '')
-            # xml:id lives in the XML namespace, not MEI namespace
-            xml_id = app.get('{http://www.w3.org/XML/1998/namespace}id', '')
-            app_ids.append(xml_id.lower())
-
-            name_el = app.find('mei:name', namespaces=ns)
-            if name_el is not None and name_el.text:
-                app_names.append(name_el.text.lower())
-
-            for p in app.findall('mei:p', namespaces=ns):
-                if p.text:
-                    p_texts.append(p.text.lower())
-
-        # 1. mei-friend
-        if any('mei-friend' in n for n in app_names):
-            return 'mei_friend'
-
-        # 2. sibelius
-        if any('sibmei' in i for i in app_ids) or any('sibelius' in n for n in app_names):
-            return 'sibelius'
-
-        # 3. humdrum – structural marker
-        if root.find(f'.//{{{self.HUM_NS}}}frames') is not None:
-            return 'humdrum'
-        if any('humdrum' in p for p in p_texts):
-            return 'humdrum'
-        if root.find('.//mei:extMeta', namespaces=ns) is not None:
-            return 'humdrum'
-
-        # 4. musescore
-        if any('musescore' in n for n in app_names):
-            return 'musescore'
-        meiversion = root.get('meiversion', '').lower()
-        if 'basic' in meiversion:
-            return 'musescore'
 
-        return 'unknown'
+        The rules live in mei_source_type, shared with the updater and
+        sniff_source_type().
+        """
+        return detect_source_type(root)
 
     # ------------------------------------------------------------------
     # Helpers
@@ -519,14 +697,12 @@ class MEI_Metadata_Extractor:
         row['mei_version'] = root.get('meiversion', '')
 
         # Title
-        el = root.find('.//mei:fileDesc/mei:titleStmt/mei:title', namespaces=ns)
+        el = _first(_TITLES, root)
         row['title'] = self._text(el)
 
         # People in titleStmt/respStmt
         editors = []
-        for pn in root.findall(
-                './/mei:fileDesc/mei:titleStmt/mei:respStmt/mei:persName',
-                namespaces=ns):
+        for pn in _TITLE_PERSNAMES(root):
             role = pn.get('role', '')
             name = self._text(pn)
             if role == 'composer':
@@ -539,7 +715,7 @@ class MEI_Metadata_Extractor:
         row['editors'] = '|'.join(editors)
 
         # pubStmt
-        pub = root.find('.//mei:fileDesc/mei:pubStmt', namespaces=ns)
+        pub = _first(_PUB_STMT, root)
         if pub is not None:
             row['publisher'] = self._text(pub.find('mei:publisher', namespaces=ns))
             distributors = [
@@ -554,7 +730,7 @@ class MEI_Metadata_Extractor:
             row['rights'] = self._text(pub.find('mei:availability', namespaces=ns))
 
         # Encoding application
-        app = root.find('.//mei:encodingDesc/mei:appInfo/mei:application', namespaces=ns)
+        app = _first(_ENCODING_APPLICATIONS, root)
         if app is not None:
             name_el = app.find('mei:name', namespaces=ns)
             version = app.get('version', '')
@@ -563,7 +739,7 @@ class MEI_Metadata_Extractor:
             )
 
         # workList
-        work = root.find('.//mei:workList/mei:work', namespaces=ns)
+        work = _first(_WORK, root)
         if work is not None:
             row['work_title'] = self._text(work.find('mei:title', namespaces=ns))
             comp = work.find('mei:composer', namespaces=ns)
@@ -591,20 +767,14 @@ class MEI_Metadata_Extractor:
         row['mei_version'] = root.get('meiversion', '')
 
         # Title
-        row['title'] = self._text(
-            root.find('.//mei:fileDesc/mei:titleStmt/mei:title', namespaces=ns)
-        )
+        row['title'] = self._text(_first(_TITLES, root))
 
         # Composer (Sibelius places <composer> directly in <titleStmt>)
-        row['composer_name'] = self._text(
-            root.find('.//mei:fileDesc/mei:titleStmt/mei:composer', namespaces=ns)
-        )
+        row['composer_name'] = self._text(_first(_TITLE_COMPOSER, root))
 
         # Other people in respStmt
         editors = []
-        for pn in root.findall(
-                './/mei:fileDesc/mei:titleStmt/mei:respStmt/mei:persName',
-                namespaces=ns):
+        for pn in _TITLE_PERSNAMES(root):
             role = pn.get('role', '')
             name = self._text(pn)
             if name:
@@ -612,16 +782,10 @@ class MEI_Metadata_Extractor:
         row['editors'] = '|'.join(editors)
 
         # Rights
-        row['rights'] = self._text(
-            root.find(
-                './/mei:fileDesc/mei:pubStmt/mei:availability/mei:useRestrict',
-                namespaces=ns)
-        )
+        row['rights'] = self._text(_first(_USE_RESTRICT, root))
 
         # Encoding application – prefer the sibmei plug-in entry
-        for app in root.findall(
-                './/mei:encodingDesc/mei:appInfo/mei:application',
-                namespaces=ns):
+        for app in _ENCODING_APPLICATIONS(root):
             xml_id = app.get('{http://www.w3.org/XML/1998/namespace}id', '')
             if 'sibmei' in xml_id.lower():
                 name_el = app.find('mei:name', namespaces=ns)
@@ -632,7 +796,7 @@ class MEI_Metadata_Extractor:
                 break
 
         # workList
-        work = root.find('.//mei:workList/mei:work', namespaces=ns)
+        work = _first(_WORK, root)
         if work is not None:
             row['work_title'] = self._text(work.find('mei:title', namespaces=ns))
             wl_comp = work.find('mei:composer', namespaces=ns)
@@ -667,14 +831,10 @@ class MEI_Metadata_Extractor:
         row['mei_version'] = root.get('meiversion', '')
 
         # Primary title
-        row['title'] = self._text(
-            root.find('.//mei:fileDesc/mei:titleStmt/mei:title', namespaces=ns)
-        )
+        row['title'] = self._text(_first(_TITLES, root))
 
         # sourceDesc/bibl
-        bibl = root.find(
-            './/mei:fileDesc/mei:sourceDesc/mei:source/mei:bibl',
-            namespaces=ns)
+        bibl = _first(_SOURCE_BIBL, root)
         if bibl is not None:
             row['source_title'] = self._text(bibl.find('mei:title', namespaces=ns))
 
@@ -716,9 +876,7 @@ class MEI_Metadata_Extractor:
             row['editors'] = '|'.join(all_entries)
 
         # Encoding application
-        app = root.find(
-            './/mei:encodingDesc/mei:appInfo/mei:application',
-            namespaces=ns)
+        app = _first(_ENCODING_APPLICATIONS, root)
         if app is not None:
             name_el = app.find('mei:name', namespaces=ns)
             version = app.get('version', '')
@@ -727,7 +885,7 @@ class MEI_Metadata_Extractor:
             )
 
         # workList
-        work = root.find('.//mei:workList/mei:work', namespaces=ns)
+        work = _first(_WORK, root)
         if work is not None:
             main_part = work.find(
                 './/mei:title/mei:titlePart[@type="main"]', namespaces=ns)
@@ -750,7 +908,7 @@ class MEI_Metadata_Extractor:
 
         # humdrum_id from extMeta frames
         hum_ns = self.HUM_NS
-        for frame in root.findall(f'.//{{{hum_ns}}}metaFrame'):
+        for frame in _HUM_META_FRAMES(root):
             fi = frame.find(f'{{{hum_ns}}}frameInfo')
             if fi is None:
                 continue
@@ -779,8 +937,7 @@ class MEI_Metadata_Extractor:
 
         # Titles
         main_titles, sub_titles = [], []
-        for t in root.findall(
-                './/mei:fileDesc/mei:titleStmt/mei:title', namespaces=ns):
+        for t in _TITLES(root):
             text = self._text(t)
             if not text:
                 continue
@@ -795,9 +952,7 @@ class MEI_Metadata_Extractor:
 
         # People in titleStmt/respStmt
         editors = []
-        for pn in root.findall(
-                './/mei:fileDesc/mei:titleStmt/mei:respStmt/mei:persName',
-                namespaces=ns):
+        for pn in _TITLE_PERSNAMES(root):
             role = pn.get('role', '')
             name = self._text(pn)
             if role == 'composer':
@@ -817,9 +972,7 @@ class MEI_Metadata_Extractor:
                     editors.append(f'{name} [{role}]' if role else name)
 
         # Also check pubStmt/respStmt for additional encoder entries
-        for pn in root.findall(
-                './/mei:fileDesc/mei:pubStmt/mei:respStmt/mei:persName',
-                namespaces=ns):
+        for pn in _PUB_PERSNAMES(root):
             role = pn.get('role', '')
             name = self._text(pn)
             if name:
@@ -831,9 +984,7 @@ class MEI_Metadata_Extractor:
 
         # Encoding applications – list all (Verovio + mei-friend typically)
         app_entries = []
-        for app in root.findall(
-                './/mei:encodingDesc/mei:appInfo/mei:application',
-                namespaces=ns):
+        for app in _ENCODING_APPLICATIONS(root):
             name_el = app.find('mei:name', namespaces=ns)
             version = app.get('version', '')
             if name_el is not None and name_el.text:
@@ -847,10 +998,34 @@ class MEI_Metadata_Extractor:
         Fallback extractor for unrecognised source types.
         Pulls whatever common fields it can find.
         """
-        ns = {'mei': self.MEI_NS}
         row = self._empty_row(filename, 'unknown')
         row['mei_version'] = root.get('meiversion', '')
-        row['title'] = self._text(
-            root.find('.//mei:fileDesc/mei:titleStmt/mei:title', namespaces=ns)
-        )
+        row['title'] = self._text(_first(_TITLES, root))
         return row
+
+
+class Extraction_Error:
+    """A file MEI_Metadata_Extractor.save_csvs() could not extract."""
+
+    def __init__(self, filepath, error):
+        self.filepath = filepath
+        self.filename = os.path.basename(filepath)
+        self.error = error          # 'ExceptionType: message'
+
+    def __repr__(self):
+        return f'Extraction_Error({self.filename!r}, {self.error!r})'
+
+
+def _extract_job(job):
+    """Worker for save_csvs(): extract one file, returning (filepath, row, error)."""
+    filepath, crim_mode, header_only = job
+    extractor = MEI_Metadata_Extractor(crim_mode=crim_mode, header_only=header_only)
+    try:
+        if crim_mode:
+            root = extractor._parse(filepath)
+            row = extractor._extract_crim_row(root, os.path.basename(filepath))
+        else:
+            row = extractor._extract_file(filepath)
+    except Exception as exc:
+        return filepath, None, f'{type(exc).__name__}: {exc}'
+    return filepath, row, None
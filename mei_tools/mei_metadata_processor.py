@@ -1,30 +1,30 @@
 import os
+import time
+import logging
 import xml.etree.ElementTree as ET
 from lxml import etree
 from datetime import datetime
 from copy import deepcopy
 
+from .mei_event_log import MEI_Event_Log
+from .mei_reader import parse_mei
+from .mei_discovery import mei_file_stem
+from .mei_document import MEI_Document
+from .mei_head_splicer import find_head_span, write_spliced_mei
+from .mei_header_compare import output_is_current
+from .mei_metadata_updater_generic import File_Update_Result
+
+# Attributes that change on every run: the publication date stamped in pubStmt
+_VOLATILE = (('mei:meiHead/mei:fileDesc/mei:pubStmt/mei:date', 'isodate'),)
 
-def _read_mei_bytes(filepath):
-    """
-    Read an MEI file and return UTF-8 bytes.
-    Sibelius files are UTF-16 (BOM-prefixed); this converts them transparently.
-    """
-    with open(filepath, 'rb') as fh:
-        raw = fh.read()
-    if raw[:2] in (b'\xff\xfe', b'\xfe\xff'):
-        text = raw.decode('utf-16')
-        text = text.replace('encoding="UTF-16"', 'encoding="UTF-8"')
-        text = text.replace("encoding='UTF-16'", "encoding='UTF-8'")
-        raw = text.encode('utf-8')
-    return raw
 
 class MEI_Metadata_Updater:
     """
     A class for processing and updating metadata in MEI (Music Encoding Initiative) files.
     """
     
-    def __init__(self, input_folder=None, output_folder=None, namespace=None, verbose=False):
+    def __init__(self, input_folder=None, output_folder=None, namespace=None, verbose=False,
+                 log_level=logging.INFO, splice_header=False, skip_unchanged=False):
         """
         Initialize the MEI Metadata Processor.
         
@@ -35,6 +35,17 @@ class MEI_Metadata_Updater:
             namespace (dict, optional): XML namespace dictionary for MEI files.
                                        Defaults to {'mei': 'http://www.music-encoding.org/ns/mei'}.
             verbose (bool, optional): Whether to print detailed processing information. Defaults to False.
+            log_level (int, optional): Lowest logging level printed to the console. Defaults to
+                                       logging.INFO; None silences the console. Nothing is printed
+                                       once the application configures logging (its handlers get
+                                       the messages instead). Messages are always kept in self.events.
+            splice_header (bool, optional): Parse only the meiHead of each file and splice the
+                                            updated header into a copy of the original, keeping
+                                            the music body byte for byte. Defaults to False.
+            skip_unchanged (bool, optional): Do not rewrite an existing _rev file that is newer
+                                             than its input and already has the header the update
+                                             would write, apart from the pubStmt date. Defaults
+                                             to False.
         """
         self.input_folder = input_folder
         self.output_folder = output_folder if output_folder else input_folder
@@ -49,36 +60,38 @@ class MEI_Metadata_Updater:
         # Verbose mode for debugging
         self.verbose = verbose
         
+        # Console threshold, and the (level, message) events of the last apply_metadata call
+        self.log_level = log_level
+        self.events = []
+        
+        # Rewrite only the header of each file (see mei_head_splicer)
+        self.splice_header = splice_header
+        
+        # Leave up-to-date outputs untouched (see mei_header_compare)
+        self.skip_unchanged = skip_unchanged
+        
         # Initialize counters for processing statistics
         self.processed_files = 0
         self.successful_updates = 0
         self.failed_updates = 0
 
     # now the functions
-    def apply_metadata(self, mei_path, matching_dict, output_folder):
-        """Updates metadata in an MEI file based on the provided matching dictionary.
+    def update_document(self, document, matching_dict):
+        """Applies the CRIM metadata in matching_dict to an MEI document held in memory.
+        
+        The tree is edited in place, exactly as apply_metadata() edits each file, but
+        nothing is written.
         
         Args:
-            mei_path (str): Path to the MEI file to update
+            document (MEI_Document): The document to update (or bytes, an lxml tree or
+                                     root, or a path; see MEI_Document.load)
             matching_dict (dict): Dictionary containing metadata values to apply
-            output_folder (str): Path to the output folder for the updated file
         
         Returns:
-            str: Formatted XML string of the updated MEI file
+            MEI_Document: The updated document
         """
-        # get the file and build revised name
-        full_path = os.path.basename(mei_path)
-        basename = os.path.splitext(os.path.basename(full_path))[0]
-        revised_name = basename + "_rev.mei"
-        print('Getting ' + basename)
-        
-        try:
-            # Parse the MEI file; _read_mei_bytes handles UTF-16 (Sibelius) files
-            raw  = _read_mei_bytes(mei_path)
-            root = etree.fromstring(raw)
-        except etree.ParseError as e:
-            print(f"Error parsing {mei_path}: {e}")
-            return f"Error: Could not parse {mei_path}. Make sure it contains valid XML."
+        document = MEI_Document.load(document)
+        root = document.root
         
         # define namespace for mei
         ns = {'mei': 'http://www.music-encoding.org/ns/mei'}
@@ -256,9 +269,6 @@ class MEI_Metadata_Updater:
             for child in head_el:
                 remove_ids_from_head_children(child)
         
-        # save the result
-        output_file_path = os.path.join(output_folder, revised_name)
-        
         # Get the MEI namespace
         mei_ns = "http://www.music-encoding.org/ns/mei"
         
@@ -269,21 +279,76 @@ class MEI_Metadata_Updater:
         if "{http://www.w3.org/XML/1998/namespace}id" in root.attrib:
             del root.attrib["{http://www.w3.org/XML/1998/namespace}id"]
         
-        # Format the XML with proper indentation
-        etree.indent(root, space="    ")
+        return document
 
+    def apply_metadata(self, mei_path, matching_dict, output_folder):
+        """Updates metadata in an MEI file based on the provided matching dictionary.
         
-        # Serialize to string with XML declaration
-        formatted_xml = etree.tostring(
-            root,
-            pretty_print=True,
-            encoding='utf-8',
-            xml_declaration=True
-        )
+        Args:
+            mei_path (str): Path to the MEI file to update
+            matching_dict (dict): Dictionary containing metadata values to apply
+            output_folder (str): Path to the output folder for the updated file
         
-        # Write to file
-        with open(output_file_path, 'wb') as f:
-            f.write(formatted_xml)
+        Returns:
+            File_Update_Result: status 'updated' (output_path is the <stem>_rev.mei written),
+                                'unchanged' (skip_unchanged found that file up to date) or
+                                'failed' (error says why the file could not be parsed).
+                                Errors writing the output are raised.
+
+        Changed in 2.1.0: earlier versions returned the serialized file as bytes (or, with
+        splice_header, its path), None when unchanged and an 'Error: …' string on failure.
+        """
+        # get the file and build revised name
+        full_path = os.path.basename(mei_path)
+        basename = mei_file_stem(full_path)
+        revised_name = basename + "_rev.mei"
+        log = MEI_Event_Log(self.log_level)
+        self.events = log.events
+        log.info('Getting ' + basename)
+        result = File_Update_Result(mei_path, 'updated')
+        start = time.perf_counter()
         
-        print(f'Saved updated {revised_name}')
-        return formatted_xml
+        try:
+            # Parse the MEI file; parse_mei handles UTF-16 (Sibelius) files.
+            # When splicing, only the header is needed
+            span = find_head_span(mei_path) if self.splice_header else None
+            root = parse_mei(mei_path, header_only=span is not None)
+        except etree.ParseError as e:
+            result.status = 'failed'
+            result.error = f"Error parsing {mei_path}: {e}"
+            log.error(result.error)
+            result.seconds = time.perf_counter() - start
+            return result
+        
+        self.update_document(MEI_Document(root, mei_path), matching_dict)
+        
+        # save the result
+        output_file_path = os.path.join(output_folder, revised_name)
+        
+        if self.skip_unchanged and output_is_current(mei_path, root, output_file_path, _VOLATILE):
+            log.info(f'Unchanged {revised_name}')
+            result.status = 'unchanged'
+        elif span is not None:
+            write_spliced_mei(mei_path, span, root, output_file_path)
+            result.output_path = output_file_path
+            log.info(f'Saved updated {revised_name}')
+        else:
+            # Format the XML with proper indentation
+            etree.indent(root, space="    ")
+
+            # Serialize to string with XML declaration
+            formatted_xml = etree.tostring(
+                root,
+                pretty_print=True,
+                encoding='utf-8',
+                xml_declaration=True
+            )
+
+            # Write to file
+            with open(output_file_path, 'wb') as f:
+                f.write(formatted_xml)
+            result.output_path = output_file_path
+            log.info(f'Saved updated {revised_name}')
+
+        result.seconds = time.perf_counter() - start
+        return result
@@ -16,7 +16,7 @@ Design principles
 * Pipe-separated lists (editors, distributors) are split and written as
   individual elements.
 * UTF-16 Sibelius files are silently converted to UTF-8 on read; all
-  output is always UTF-8.
+  output is always UTF-8 (unless splice_header=True, see below).
 * No project-specific hardcoding: publisher, rights, etc. all come from
   the CSV.
 
@@ -33,6 +33,16 @@ project.  In this mode:
 * Processing is delegated to MEI_Metadata_Updater.apply_metadata(),
   which writes the full CRIM header including manifestationList.
 
+Header splicing
+---------------
+By default every file is parsed and re-serialized in full.  Pass
+splice_header=True to the constructor to parse only the meiHead, and
+write the original file with just its meiHead replaced (see
+mei_head_splicer).  The music body, the XML declaration and the file's
+encoding are then kept byte for byte, which makes large corpora much
+faster to update.  Files the splicer cannot lay out (e.g. in an encoding
+other than UTF-8/UTF-16) are rewritten in full as before.
+
 Usage
 -----
     # Generic (non-CRIM) workflow
@@ -53,20 +63,37 @@ Usage
     )
 """
 
+import io
 import os
 import csv
-import glob
-import urllib.request
+import time
+import itertools
+import contextlib
+import collections
+import multiprocessing
 from copy import deepcopy
 from datetime import datetime
 from lxml import etree
 
-from .mei_metadata_extractor import _read_mei_bytes, CSV_COLUMNS
+from .mei_reader import parse_mei
+from .mei_document import MEI_Document
+from .mei_head_splicer import find_head_span, write_spliced_mei
+from .mei_url_cache import URL_Cache, DEFAULT_TTL
+from .mei_header_compare import output_is_current
+from .mei_discovery import find_mei_files, mei_file_stem
+from .mei_source_type import detect_source_type
+from .mei_metadata_extractor import CSV_COLUMNS, _WORK, _first
 
 MEI_NS  = 'http://www.music-encoding.org/ns/mei'
 HUM_NS  = 'http://www.humdrum.org/ns/humxml'
 XML_NS  = 'http://www.w3.org/XML/1998/namespace'
 
+# Attributes that change on every run: the updater's appInfo timestamp
+_VOLATILE = (
+    ("mei:meiHead/mei:encodingDesc/mei:appInfo/mei:application"
+     "[mei:name='MEI Metadata Updater Generic']", 'isodate'),
+)
+
 
 def _ns(tag):
     """Return a Clark-notation MEI tag, e.g. '{http://...}title'."""
@@ -95,23 +122,50 @@ class MEI_Metadata_Updater_Generic:
     content untouched.
     """
 
-    def __init__(self, verbose=False):
+    def __init__(self, verbose=False, splice_header=False, url_cache_dir=None,
+                 url_ttl=DEFAULT_TTL, skip_unchanged=False):
+        """
+        Parameters
+        ----------
+        verbose : bool
+            Print progress for every file.
+        splice_header : bool
+            Parse only each file's meiHead and splice the updated header
+            into a copy of the original file, leaving the music body (and
+            encoding) untouched, instead of re-serializing the whole file.
+        url_cache_dir : str, optional
+            Folder where CSVs loaded from a URL are cached (default:
+            mei_url_cache.default_cache_dir()).
+        url_ttl : float
+            Seconds a cached CSV is reused without asking the server
+            whether it changed (default 300; 0 checks on every load).
+        skip_unchanged : bool
+            Leave an existing <stem>_rev.mei alone (keeping its modification
+            time) when it is newer than its input and already has the header
+            the update would write, apart from the run timestamp.  See
+            mei_header_compare.
+        """
         self.verbose = verbose
+        self.splice_header = splice_header
+        self.url_cache = URL_Cache(url_cache_dir, ttl=url_ttl)
+        self.skip_unchanged = skip_unchanged
 
     # ------------------------------------------------------------------
     # Public interface
     # ------------------------------------------------------------------
 
     def process_folder(self, input_folder, csv_source, output_folder,
-                       crim_mode=False):
+                       crim_mode=False, workers=1):
         """
         Update every MEI file in *input_folder* that has a matching row
         in *csv_source*, writing results to *output_folder*.
 
         Parameters
         ----------
-        input_folder : str
-            Folder containing MEI files to process.
+        input_folder : str or iterable of str
+            Folder containing MEI files to process (searched
+            non-recursively), or the MEI file paths themselves, e.g. a
+            lazy mei_discovery.find_mei_files(folder, recursive=True).
         csv_source : str
             Local file path **or** URL to a CSV file (e.g. Google Sheets
             "publish as CSV" link).
@@ -123,49 +177,95 @@ class MEI_Metadata_Updater_Generic:
             writes the full CRIM header including manifestationList.
             The CSV must use CRIM column names (as produced by
             MEI_Metadata_Extractor(crim_mode=True)).
+        workers : int or None, optional
+            Number of worker processes updating files in parallel (default
+            1, i.e. one file after another in this process; None means one
+            per CPU).  Only a few files per worker are queued at a time, and
+            messages and results always follow the input order.
+
+        Returns
+        -------
+        Update_Summary
+            The matched, skipped and failed counts, with a
+            File_Update_Result (status, error, seconds) for every file.
         """
         os.makedirs(output_folder, exist_ok=True)
 
         metadata = self.load_csv(csv_source)
         if not metadata:
             print('No metadata rows loaded from', csv_source)
-            return
+            return Update_Summary()
 
         # Choose key column based on mode
         key_col = 'MEI_Name' if crim_mode else 'filename'
         lookup  = {row[key_col]: row for row in metadata if row.get(key_col)}
 
-        mei_files = sorted(glob.glob(os.path.join(input_folder, '*.mei')))
-        if not mei_files:
+        if isinstance(input_folder, (str, os.PathLike)):
+            mei_files = find_mei_files(input_folder)
+        else:
+            mei_files = iter(input_folder)
+        first = next(mei_files, None)
+        if first is None:
             print('No .mei files found in', input_folder)
-            return
+            return Update_Summary()
 
         if crim_mode:
             # Import here to avoid circular dependency at module level
             from .mei_metadata_processor import MEI_Metadata_Updater
-            crim_updater = MEI_Metadata_Updater(verbose=self.verbose)
-
-        matched = skipped = 0
-        for filepath in mei_files:
-            basename = os.path.basename(filepath)
-            if basename not in lookup:
-                if self.verbose:
-                    print(f'  No CSV row for {basename} — skipping')
-                skipped += 1
-                continue
-            try:
-                if crim_mode:
-                    crim_updater.apply_metadata(
-                        filepath, lookup[basename], output_folder
-                    )
+            updater = MEI_Metadata_Updater(verbose=self.verbose,
+                                           splice_header=self.splice_header,
+                                           skip_unchanged=self.skip_unchanged)
+        else:
+            updater = self
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        # Workers receive a copy of the updater once, so they run the same
+        # class (subclasses included) with the same settings
+        pool = (multiprocessing.Pool(workers, initializer=_init_update_worker,
+                                     initargs=(updater,))
+                if workers > 1 else None)
+        window = workers * 4 if pool is not None else 0
+
+        # Files in input order: File_Update_Result, or its pending pool result
+        summary = Update_Summary()
+        pending = collections.deque()
+        try:
+            for filepath in itertools.chain([first], mei_files):
+                basename = os.path.basename(filepath)
+                if basename not in lookup:
+                    outcome = File_Update_Result(filepath, 'skipped')
                 else:
-                    self._update_file(filepath, lookup[basename], output_folder)
-                matched += 1
-            except Exception as exc:
-                print(f'  ERROR updating {basename}: {exc}')
-                skipped += 1
-
-        print(f'Done. Updated {matched} file(s), skipped {skipped}.')
+                    job = (filepath, lookup[basename], output_folder, crim_mode)
+                    outcome = (_run_update(updater, *job) if pool is None
+                               else pool.apply_async(_update_job, (job,)))
+                pending.append(outcome)
+                while len(pending) > window:
+                    self._collect_update(pending.popleft(), summary)
+            while pending:
+                self._collect_update(pending.popleft(), summary)
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+        unchanged = f' ({summary.unchanged} already up to date)' if summary.unchanged else ''
+        print(f'Done. Updated {summary.matched} file(s){unchanged}, '
+              f'skipped {summary.skipped}, failed {summary.failed}.')
+        return summary
+
+    def _collect_update(self, outcome, summary):
+        """Report one file's outcome from process_folder() and add it to *summary*."""
+        if not isinstance(outcome, File_Update_Result):
+            outcome = outcome.get()
+        if outcome.status == 'skipped':
+            if self.verbose:
+                print(f'  No CSV row for {outcome.filename} — skipping')
+        else:
+            print(outcome.output, end='')
+            if outcome.status == 'failed':
+                print(f'  ERROR updating {outcome.filename}: {outcome.error}')
+        summary.results.append(outcome)
 
     def load_csv(self, csv_source):
         """
@@ -175,38 +275,37 @@ class MEI_Metadata_Updater_Generic:
         expected field names.  Extra columns in the CSV are preserved so
         user annotations are not lost.
 
+        A URL is fetched through self.url_cache: the response is cached on
+        disk, revalidated with ETag / Last-Modified once url_ttl has
+        passed, and used as is if the server cannot be reached or fails
+        with a 5xx error.  Other HTTP errors (e.g. 404) are raised.
+
         Parameters
         ----------
         csv_source : str
             Local file path or http(s):// URL.
         """
         if csv_source.startswith('http://') or csv_source.startswith('https://'):
-            with urllib.request.urlopen(csv_source) as resp:
-                content = resp.read().decode('utf-8')
-            rows = list(csv.DictReader(content.splitlines()))
+            fh = self.url_cache.open(csv_source)
         else:
-            with open(csv_source, encoding='utf-8', newline='') as fh:
-                rows = list(csv.DictReader(fh))
+            fh = open(csv_source, encoding='utf-8', newline='')
+        with fh:
+            rows = list(csv.DictReader(fh))
 
         if self.verbose:
             print(f'Loaded {len(rows)} row(s) from {csv_source}')
         return rows
 
-    # ------------------------------------------------------------------
-    # Internal: single-file update
-    # ------------------------------------------------------------------
-
-    def _update_file(self, filepath, update_dict, output_folder):
-        basename = os.path.basename(filepath)
-        stem     = os.path.splitext(basename)[0]
-        out_name = stem + '_rev.mei'
-        out_path = os.path.join(output_folder, out_name)
-
-        if self.verbose:
-            print(f'Updating {basename} …')
+    def update_document(self, document, update_dict):
+        """
+        Apply one CSV row to a document held in memory and return it.
 
-        raw  = _read_mei_bytes(filepath)
-        root = etree.fromstring(raw)
+        *document* is an mei_document.MEI_Document, or anything
+        MEI_Document.load() accepts; its tree is edited in place, exactly
+        as process_folder() edits each file, but nothing is written.
+        """
+        document = MEI_Document.load(document)
+        root = document.root
 
         source_type = update_dict.get('source_type', '').lower()
         # Allow auto-detection if the CSV cell is blank
@@ -230,53 +329,53 @@ class MEI_Metadata_Updater_Generic:
         head = root.find('mei:meiHead', namespaces=ns)
         if head is not None:
             self._remove_ids(head)
+        return document
+
+    # ------------------------------------------------------------------
+    # Internal: single-file update
+    # ------------------------------------------------------------------
+
+    def _update_file(self, filepath, update_dict, output_folder):
+        """Update one file; return the path written, or None if skip_unchanged left it as it was."""
+        basename = os.path.basename(filepath)
+        stem     = mei_file_stem(basename)
+        out_name = stem + '_rev.mei'
+        out_path = os.path.join(output_folder, out_name)
+
+        if self.verbose:
+            print(f'Updating {basename} …')
+
+        # With splice_header, locate the header first so only it is parsed
+        span = find_head_span(filepath) if self.splice_header else None
+        root = parse_mei(filepath, header_only=span is not None)
+        self.update_document(MEI_Document(root, filepath), update_dict)
 
-        etree.indent(root, space='    ')
-        xml_bytes = etree.tostring(
-            root,
-            pretty_print=True,
-            encoding='utf-8',
-            xml_declaration=True,
-        )
-        with open(out_path, 'wb') as fh:
-            fh.write(xml_bytes)
+        if self.skip_unchanged and output_is_current(filepath, root, out_path, _VOLATILE):
+            print(f'  Unchanged {out_name}')
+            return None
+
+        if span is not None:
+            write_spliced_mei(filepath, span, root, out_path)
+        else:
+            etree.indent(root, space='    ')
+            xml_bytes = etree.tostring(
+                root,
+                pretty_print=True,
+                encoding='utf-8',
+                xml_declaration=True,
+            )
+            with open(out_path, 'wb') as fh:
+                fh.write(xml_bytes)
 
         print(f'  Saved {out_name}')
+        return out_path
 
     # ------------------------------------------------------------------
-    # Source-type detection  (mirrors mei_metadata_extractor)
+    # Source-type detection  (shared with mei_metadata_extractor)
     # ------------------------------------------------------------------
 
     def _detect_source_type(self, root):
-        ns = {'mei': MEI_NS}
-        app_names, app_ids, p_texts = [], [], []
-
-        for app in root.findall('.//mei:appInfo/mei:application', namespaces=ns):
-            app_ids.append(
-                app.get(f'{{{XML_NS}}}id', '').lower()
-            )
-            name_el = app.find('mei:name', namespaces=ns)
-            if name_el is not None and name_el.text:
-                app_names.append(name_el.text.lower())
-            for p in app.findall('mei:p', namespaces=ns):
-                if p.text:
-                    p_texts.append(p.text.lower())
-
-        if any('mei-friend' in n for n in app_names):
-            return 'mei_friend'
-        if any('sibmei' in i for i in app_ids) or any('sibelius' in n for n in app_names):
-            return 'sibelius'
-        if root.find(f'.//{{{HUM_NS}}}frames') is not None:
-            return 'humdrum'
-        if any('humdrum' in p for p in p_texts):
-            return 'humdrum'
-        if root.find('.//mei:extMeta', namespaces=ns) is not None:
-            return 'humdrum'
-        if any('musescore' in n for n in app_names):
-            return 'musescore'
-        if 'basic' in root.get('meiversion', '').lower():
-            return 'musescore'
-        return 'unknown'
+        return detect_source_type(root)
 
     # ------------------------------------------------------------------
     # Helpers
@@ -482,7 +581,7 @@ class MEI_Metadata_Updater_Generic:
             restrict_el.text = self._val(d, 'rights')
 
         if self._val(d, 'work_title'):
-            work = root.find('.//mei:workList/mei:work', namespaces=ns)
+            work = _first(_WORK, root)
             if work is not None:
                 wt = _find_or_create(work, 'title')
                 wt.text = self._val(d, 'work_title')
@@ -635,7 +734,7 @@ class MEI_Metadata_Updater_Generic:
             l_el.text = self._val(d, 'encoding_annot')
 
         # workList
-        work = root.find('.//mei:workList/mei:work', namespaces=ns)
+        work = _first(_WORK, root)
         if work is not None:
             if self._val(d, 'work_title'):
                 title_el = work.find('mei:title', namespaces=ns)
@@ -749,7 +848,7 @@ class MEI_Metadata_Updater_Generic:
 
     def _update_worklist_basic(self, root, d, ns):
         """Update workList title and genre for simpler header types."""
-        work = root.find('.//mei:workList/mei:work', namespaces=ns)
+        work = _first(_WORK, root)
         if work is None:
             return
 
@@ -795,3 +894,107 @@ class MEI_Metadata_Updater_Generic:
     @staticmethod
     def _text_of(element):
         return (element.text or '').strip()
+
+
+class File_Update_Result:
+    """
+    Outcome of one file in MEI_Metadata_Updater_Generic.process_folder(),
+    also returned by MEI_Metadata_Updater.apply_metadata().
+    """
+
+    def __init__(self, filepath, status):
+        self.filepath = filepath
+        self.filename = os.path.basename(filepath)
+        self.status = status        # 'updated', 'unchanged', 'skipped' (no CSV row) or 'failed'
+        self.error = None           # error message when status is 'failed'
+        self.seconds = 0.0          # wall time spent updating the file
+        self.output = ''            # what the update printed
+        self.output_path = None     # the <stem>_rev.mei written, if any
+
+    def __repr__(self):
+        return (f'File_Update_Result({self.filename!r}, '
+                f'status={self.status!r}, seconds={self.seconds:.3f})')
+
+
+class Update_Summary:
+    """What MEI_Metadata_Updater_Generic.process_folder() did."""
+
+    def __init__(self):
+        # One File_Update_Result per input file, in input order
+        self.results = []
+
+    def _count(self, status):
+        return sum(result.status == status for result in self.results)
+
+    @property
+    def matched(self):
+        """Number of files updated, or found up to date with skip_unchanged."""
+        return self._count('updated') + self._count('unchanged')
+
+    @property
+    def unchanged(self):
+        """Number of outputs left as they were by skip_unchanged."""
+        return self._count('unchanged')
+
+    @property
+    def skipped(self):
+        """Number of files without a CSV row."""
+        return self._count('skipped')
+
+    @property
+    def failed(self):
+        """Number of files that had a CSV row but could not be updated."""
+        return self._count('failed')
+
+    @property
+    def timings(self):
+        """Seconds spent on each updated or failed file, by path."""
+        return {result.filepath: result.seconds
+                for result in self.results if result.status != 'skipped'}
+
+    def __repr__(self):
+        return (f'Update_Summary(matched={self.matched}, skipped={self.skipped}, '
+                f'failed={self.failed})')
+
+
+# The updater a process_folder() worker process uses for its files
+_worker_updater = None
+
+
+def _init_update_worker(updater):
+    """Pool initializer for process_folder(): keep the updater for _update_job()."""
+    global _worker_updater
+    _worker_updater = updater
+
+
+def _update_job(job):
+    """Worker for process_folder(): update one file with the process's updater."""
+    return _run_update(_worker_updater, *job)
+
+
+def _run_update(updater, filepath, row, output_folder, crim_mode):
+    """
+    Update one file for process_folder() with *updater* (the generic
+    updater, or an MEI_Metadata_Updater in CRIM mode), capturing what it
+    prints, and return its File_Update_Result.
+    """
+    result = File_Update_Result(filepath, 'updated')
+    output = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(output):
+            if crim_mode:
+                outcome = updater.apply_metadata(filepath, row, output_folder)
+                result.status = outcome.status
+                result.error = outcome.error
+                result.output_path = outcome.output_path
+            else:
+                result.output_path = updater._update_file(filepath, row, output_folder)
+                if result.output_path is None:
+                    result.status = 'unchanged'
+    except Exception as exc:
+        result.status = 'failed'
+        result.error = str(exc)
+    result.seconds = time.perf_counter() - start
+    result.output = output.getvalue()
+    return result
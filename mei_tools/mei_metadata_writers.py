@@ -0,0 +1,117 @@
+"""
+mei_metadata_writers.py
+=======================
+Output formats for the rows produced by MEI_Metadata_Extractor.
+
+Every writer takes the extracted rows (dicts), the column schema they
+follow (CSV_COLUMNS or CRIM_CSV_COLUMNS) and a path, and writes the
+columns in schema order, every value as a string:
+
+    csv      – comma-separated text, as written by save_csvs()
+    jsonl    – one JSON object per line (newline-delimited JSON)
+    parquet  – Apache Parquet, needs pyarrow
+    arrow    – Arrow IPC file format (Feather v2), needs pyarrow
+
+rows_to_dataframe() builds a pandas DataFrame with the same columns
+instead of writing a file.  pyarrow and pandas are optional: they are
+only imported when a format that needs them is asked for, and are
+installed with the package's extras (pip install "mei_tools[parquet]",
+"mei_tools[dataframe]").
+"""
+
+import csv
+import json
+import importlib
+
+# File extension used for each format
+EXTENSIONS = {
+    'csv':     '.csv',
+    'jsonl':   '.jsonl',
+    'parquet': '.parquet',
+    'arrow':   '.arrow',
+}
+
+
+# The mei_tools extra that installs each optional package
+EXTRAS = {
+    'pyarrow': 'parquet',
+    'pandas':  'dataframe',
+}
+
+
+def _import_optional(module, purpose):
+    """Import *module*, explaining what it is needed for if it is missing."""
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        package = module.split('.')[0]
+        raise ImportError(f'{purpose} needs the optional package {package!r}; '
+                          f'install it with `pip install "mei_tools[{EXTRAS[package]}]"` '
+                          f'(or `pip install {package}`)') from None
+
+
+def _arrow_table(rows, columns):
+    """Return the rows as a pyarrow Table of string columns."""
+    pa = _import_optional('pyarrow', 'Writing Parquet or Arrow files')
+    schema = pa.schema([(column, pa.string()) for column in columns])
+    data = {column: [row.get(column, '') for row in rows] for column in columns}
+    return pa.Table.from_pydict(data, schema=schema)
+
+
+def write_csv(rows, columns, path):
+    """Write *rows* to *path* as CSV with a header line."""
+    with open(path, 'w', newline='', encoding='utf-8') as fh:
+        writer = csv.DictWriter(fh, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def write_jsonl(rows, columns, path):
+    """Write *rows* to *path* as one JSON object per line."""
+    with open(path, 'w', encoding='utf-8') as fh:
+        for row in rows:
+            record = {column: row.get(column, '') for column in columns}
+            fh.write(json.dumps(record, ensure_ascii=False))
+            fh.write('\n')
+
+
+def write_parquet(rows, columns, path):
+    """Write *rows* to *path* as a Parquet file (needs pyarrow)."""
+    pq = _import_optional('pyarrow.parquet', 'Writing Parquet files')
+    pq.write_table(_arrow_table(rows, columns), path)
+
+
+def write_arrow(rows, columns, path):
+    """Write *rows* to *path* as an Arrow IPC file (needs pyarrow)."""
+    feather = _import_optional('pyarrow.feather', 'Writing Arrow files')
+    feather.write_feather(_arrow_table(rows, columns), path)
+
+
+WRITERS = {
+    'csv':     write_csv,
+    'jsonl':   write_jsonl,
+    'parquet': write_parquet,
+    'arrow':   write_arrow,
+}
+
+
+def get_writer(output_format):
+    """
+    Return the writer for *output_format*, checking up front that any
+    optional package it needs is installed.
+    """
+    if output_format not in WRITERS:
+        raise ValueError(f'Unknown output format {output_format!r}; '
+                         f'choose from {", ".join(WRITERS)}')
+    if output_format in ('parquet', 'arrow'):
+        _import_optional('pyarrow', f'Writing {output_format} files')
+    return WRITERS[output_format]
+
+
+def rows_to_dataframe(rows, columns):
+    """Return the rows (any iterable) as a pandas DataFrame with *columns* in order."""
+    pd = _import_optional('pandas', 'Building a DataFrame')
+    rows = list(rows)
+    return pd.DataFrame(
+        {column: [row.get(column, '') for row in rows] for column in columns},
+        columns=columns, dtype=object)
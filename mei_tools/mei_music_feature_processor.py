@@ -1,17 +1,49 @@
 import os
-import random
+import time
+import inspect
+import logging
+import multiprocessing
 from lxml import etree
-import xml.etree.ElementTree as ET
-import glob as glob
+
+from .mei_feature_transforms import run_feature_steps
+from .mei_writer import write_mei
+from .mei_event_log import MEI_Event_Log
+from .mei_discovery import find_mei_files, mei_file_stem
+from .mei_document import MEI_Document
+from .mei_feature_manifest import Feature_Manifest, file_sha256, make_entry, entry_is_current
+from .mei_feature_scan import scan_file, write_scan_report
 
 class MEI_Music_Feature_Processor:
     """
     A class for processing MEI XML files to correct various music features.
     """
     
-    def __init__(self):
-        """Initialize the MEI Music Feature Processor."""
-        pass
+    def __init__(self, log_level=logging.INFO):
+        """
+        Initialize the MEI Music Feature Processor.
+
+        Parameters
+        ----------
+        log_level : int or None, optional
+            Lowest logging level printed to the console (default
+            logging.INFO; logging.DEBUG also prints per-element details).
+            Pass None for a silent run.  Nothing is printed once the
+            application configures logging: the messages then go to its
+            handlers only.  All messages are kept in self.events either way.
+        """
+        self.log_level = log_level
+        # (level, message) events emitted while processing the last file
+        self.events = []
+        # MRest_Stats from the most recent correct_mrests run (None if skipped)
+        self.mrest_stats = None
+        # Seconds spent parsing, applying the steps and writing, for the last file
+        self.timings = {}
+        # Transform_Report for every transform applied to the last file
+        self.report = []
+        # If True, note which transform tags each file contains (in
+        # self.tags_present), as incremental process_corpus() runs need
+        self.survey = False
+        self.tags_present = None
 
     def process_music_features(self, mei_path,
                                output_folder,
@@ -61,752 +93,340 @@ class MEI_Music_Feature_Processor:
             remove_incipit=True,
             remove_variants=True,
             output_folder)
+
+        After each run, self.report holds one Transform_Report per applied
+        step (wall time, elements visited, elements changed),
+        self.timings the seconds spent parsing, transforming and writing,
+        and self.events every (level, message) logged along the way.
+
+        To process a whole folder on several CPU cores, see process_corpus().
+
+        Returns the path of the file written.  (Before version 2.1.0 the
+        serialized file was returned as bytes.)
         """
         # get the file and build revised name
         full_path = os.path.basename(mei_path)
-        basename = os.path.splitext(os.path.basename(full_path))[0]
+        basename = mei_file_stem(full_path)
         revised_name = basename + "_rev.mei"
-        print('Getting ' + basename)
+        log = MEI_Event_Log(self.log_level)
+        self.events = log.events
+        log.info('Getting ' + basename)
         
         # new
+        self.timings = {}
+        self.report = []
+        started = time.perf_counter()
         try:
             # Use lxml.etree instead of xml.etree.ElementTree
             mei_doc = etree.parse(mei_path)
             root = mei_doc.getroot()
         except etree.ParseError as e:
-            print(f"Error parsing {mei_path}: {e}")
+            log.error(f"Error parsing {mei_path}: {e}")
             return f"Error: Could not parse {mei_path}. Make sure it contains valid XML."
-        
 
-        # Define the namespaces
-        ns = {'mei': 'http://www.music-encoding.org/ns/mei',
-              'xml': 'http://www.w3.org/XML/1998/namespace'
-        }
-
-        # incipit removal
-        if remove_incipit:
-            # Find measure with label="0" and n="1"
-            incipit_xpath = '//mei:measure[@label="0"][@n="1"]'
-            measures = root.xpath(incipit_xpath, namespaces=ns)
-            
-            if measures:
-                incipit = measures[0]
-                
-                # Remove measure
-                parent = incipit.getparent()
-                if parent is not None:
-                    parent.remove(incipit)
-                    print("Measure removed successfully!")
-                    
-                    # Renumber remaining measures starting at 1
-                    measures = root.xpath('//mei:measure', namespaces=ns)
-                    print("\nRenumbering measures...")
-                    for idx, measure in enumerate(measures, 1):  # Start enumeration at 1
-                        old_label = measure.get('label')
-                        old_num = measure.get('n')
-                        
-                        # Set both n and label to match the current position
-                        new_number = str(idx)
-                        measure.set('n', new_number)
-                        measure.set('label', new_number)
-                    
-        # leuven incipit removal
-        if remove_incipit_leuven:
-            # The Leuven incipit consists of two leading right="invis" measures at the
-            # start of the first section, followed immediately by a scoreDef.
-            # Other right="invis" measures appear throughout the piece (invisible barlines)
-            # and must NOT be removed, so we walk the section children from the top
-            # rather than searching the whole document.
-            section = root.find('.//mei:section', namespaces=ns)
-
-            if section is None:
-                print("No section found for Leuven incipit removal.")
-            else:
-                leading_invis = []
-                following_score_def = None
-
-                for child in section:
-                    tag = child.tag.split('}')[-1] if '}' in child.tag else child.tag
-                    if tag in ('pb', 'sb'):
-                        continue  # skip layout elements before the measures
-                    elif tag == 'measure' and child.get('right') == 'invis':
-                        leading_invis.append(child)
-                    elif tag == 'scoreDef' and leading_invis:
-                        following_score_def = child
-                        break
-                    else:
-                        break  # hit a normal measure — incipit is over
-
-                if not leading_invis:
-                    print("No invisible incipit measures found for Leuven incipit removal.")
-                elif following_score_def is None:
-                    print("No scoreDef found after invisible measures.")
-                else:
-                    # Step 2: Capture meter values from the scoreDef after the incipit
-                    meter_count = following_score_def.get('meter.count')
-                    meter_unit = following_score_def.get('meter.unit')
-                    print(f"Found meter.count={meter_count}, meter.unit={meter_unit} from scoreDef after invisible measures.")
-
-                    # Step 3: Remove that scoreDef
-                    section.remove(following_score_def)
-                    print("Removed scoreDef after invisible measures.")
-
-                    # Step 4: Update the very first scoreDef of the piece
-                    first_score_def = root.find('.//mei:scoreDef', namespaces=ns)
-                    if first_score_def is not None and meter_count and meter_unit:
-                        first_score_def.set('meter.count', meter_count)
-                        first_score_def.set('meter.unit', meter_unit)
-                        print(f"Updated first scoreDef with meter.count={meter_count}, meter.unit={meter_unit}.")
-
-                    # Step 5: Remove the leading invisible measures
-                    for invis_measure in leading_invis:
-                        section.remove(invis_measure)
-                    print(f"Removed {len(leading_invis)} invisible incipit measure(s).")
-
-                    # Renumber all remaining measures starting from 1
-                    # and remove any remaining right="invis" attributes
-                    measures = root.xpath('//mei:measure', namespaces=ns)
-                    print("Renumbering measures and removing invis barline attributes...")
-                    for idx, measure in enumerate(measures, 1):
-                        new_number = str(idx)
-                        measure.set('n', new_number)
-                        measure.set('label', new_number)
-                        if measure.get('right') == 'invis':
-                            del measure.attrib['right']
-
-        # page break removal
-        if remove_pb:
-            # Find pb elements
-            pb_elements = root.findall('.//mei:pb', namespaces=ns)
-            count = len(pb_elements)
-            print(f"Found {count} page breaks to remove.")
-            for pb in pb_elements:
-                pb.getparent().remove(pb)
-            
-        # section break removal
-        if remove_sb:
-            # Find sb elements
-            sb_elements = root.findall('.//mei:sb', namespaces=ns)
-            count = len(sb_elements)
-            print(f"Found {count} section breaks to remove.")
-            for sb in sb_elements:
-                sb.getparent().remove(sb)
-              
-        # remove annotation
-        if remove_annotation:
-            annotations = root.findall('.//mei:annot', namespaces=ns)
-            count = len(annotations)
-            print(f"Found {count} annotations to remove.")
-            for annotation in annotations:
-                annotation.getparent().remove(annotation)
-
-        # multi-bar tie resolution
-        if resolve_multibar_ties:
-            # Build xml:id → note element lookup across whole document
-            id_to_note = {}
-            for note in root.xpath('//mei:note', namespaces=ns):
-                xml_id = note.get('{http://www.w3.org/XML/1998/namespace}id')
-                if xml_id:
-                    id_to_note[xml_id] = note
-
-            # Build tie graph: startid → endid (strip leading '#')
-            tie_graph = {}
-            for tie_elem in root.xpath('//mei:tie', namespaces=ns):
-                startid = (tie_elem.get('startid') or '').lstrip('#')
-                endid   = (tie_elem.get('endid')   or '').lstrip('#')
-                if startid and endid:
-                    tie_graph[startid] = endid
-
-            if not tie_graph:
-                print("  No <tie> elements found, skipping tie resolution.")
-            else:
-                # Chain heads: startids that are never themselves an endid
-                # Without this step, middle notes in a 3+ bar chain get 'i' instead of 'm'
-                all_endids = set(tie_graph.values())
-                chain_heads = [sid for sid in tie_graph if sid not in all_endids]
-
-                chains_found = 0
-                multibar_found = 0
-
-                for head in chain_heads:
-                    # Traverse the FULL chain before touching any note element
-                    chain = [head]
-                    current = head
-                    visited = {head}
-                    while current in tie_graph:
-                        nxt = tie_graph[current]
-                        if nxt in visited:
-                            print(f"  Warning: circular tie detected at {current}, breaking.")
-                            break
-                        chain.append(nxt)
-                        visited.add(nxt)
-                        current = nxt
-
-                    chains_found += 1
-                    if len(chain) > 2:
-                        multibar_found += 1
-                        print(f"  Multi-bar chain ({len(chain)} notes): {' -> '.join(chain)}")
-
-                    # Assign @tie="i"/"m"/"t" based on position in full chain
-                    for i, node_id in enumerate(chain):
-                        note_elem = id_to_note.get(node_id)
-                        if note_elem is None:
-                            print(f"  Warning: no note found for xml:id='{node_id}'")
-                            continue
-                        if len(chain) == 2:
-                            attr = 'i' if i == 0 else 't'
-                        elif i == 0:
-                            attr = 'i'
-                        elif i == len(chain) - 1:
-                            attr = 't'
-                        else:
-                            attr = 'm'  # MEI 'continue': middle of a 3+ bar chain
-                        note_elem.set('tie', attr)
-
-                print(f"  Tie resolution: {chains_found} chains processed, "
-                      f"{multibar_found} spanning 3+ measures.")
-        
-        # dir elements, which are like annotations
-        if remove_dir:
-            # Find pb elements
-            dir_elements = root.findall('.//mei:dir', namespaces=ns)
-            count = len(dir_elements)
-            print(f"Found {count} direction elements to remove.")
-            for dir in dir_elements:
-                dir.getparent().remove(dir)
-
-        # remove ligature brackets
-        if remove_ligature_bracket:
-            # Find pb elements
-            bracket_elements = root.findall('.//mei:bracketSpan', namespaces=ns)
-            count = len(bracket_elements)
-            print(f"Found {count} ligatures to remove.")
-            for bracket in bracket_elements:
-                bracket.getparent().remove(bracket)
-        
-        # remove variants
-        if remove_variants:
-            # Find all app elements (variant apparatus)
-            apps = root.findall('.//mei:app', namespaces=ns)
-            count = len(apps)
-            print(f"Found {count} variants to correct.")
-            for app in apps:
-                # Get the parent layer
-                app_parent_layer = app.getparent()
-                
-                # Find all lem elements containing notes
-                lems = app.findall('.//mei:lem', namespaces=ns)
-            
-                # Move notes to parent layer
-                for lem in lems:
-                    notes = lem.findall('.//mei:note', namespaces=ns)
-                    for note in notes:
-                        # Remove note from current position
-                        lem.remove(note)
-                        # Add note to parent layer
-                        app_parent_layer.append(note)
-                
-                # Remove all rdg elements
-                rdgs = app.findall('.//mei:rdg', namespaces=ns)
-                count = len(rdgs)
-                # print(f"Found {count} readings to remove.")
-                for rdg in rdgs:
-                    rdg_parent_layer = rdg.getparent()
-                    rdg_parent_layer.remove(rdg)
-                
-                # Finally, remove the app element itself
-                app_parent_layer.remove(app)
-        
-        # remove anchored text tags
-        if remove_anchored_text:
-            # find all anchored
-            anchored = root.findall('.//mei:anchoredText', namespaces=ns)
-
-            # remove the anchors
-            for anchor in anchored:
-                # find parent of those anchors and remove the anchored text
-                parent_layer = anchor.getparent()
-                if parent_layer is not None:
-                    parent_layer.remove(anchor)
-                    print("Anchored text removed successfully!")
-            
-        # remove timestamp and velocity
-        if remove_timestamp:
-            # for notes
-            print('Checking and Removing timestamp.')
-            notes = root.findall('.//mei:note', namespaces=ns)
-            for note in notes:
-                # Remove timestamp attribute
-                if 'tstamp.real' in note.attrib:
-                    del note.attrib['tstamp.real']
-                # Remove velocity attribute
-                if 'vel' in note.attrib:
-                    del note.attrib['vel']
-            
-            # Remove timestamp and velocity attributes from rests
-            rests = root.findall('.//mei:rest', namespaces=ns)
-            for rest in rests:
-                if 'tstamp.real' in rest.attrib:
-                    del rest.attrib['tstamp.real']
-                if 'vel' in rest.attrib:
-                    del rest.attrib['vel']
-            
-            # Remove timestamp and velocity attributes from mRests
-            mrests = root.findall('.//mei:mRest', namespaces=ns)
-            for mrest in mrests:
-                if 'tstamp.real' in mrest.attrib:
-                    del mrest.attrib['tstamp.real']
-                if 'vel' in mrest.attrib:
-                    del mrest.attrib['vel']
-            
-            # Remove tstamp2 from ties for Verovio compatibility
-            ties = root.findall('.//mei:tie', namespaces=ns)
-            for tie in ties:
-                if 'tstamp' in tie.attrib:
-                    del tie.attrib['tstamp']
-                if 'tstamp2' in tie.attrib:
-                    del tie.attrib['tstamp2']    
-        
-        # add time signature information to all scoreDefs (for CMME and JRP)
-        if correct_cmme_time_signatures:
-            score_defs = root.findall('.//mei:scoreDef', namespaces=ns)
-            count = len(score_defs)
-            print(f"Found {count} scoreDef elements to process.")
-            
-            for score_def in score_defs:
-                # Find the first staffDef in this scoreDef
-                first_staff_def = score_def.find('.//mei:staffDef', namespaces=ns)
-                
-                if first_staff_def is not None:
-                    # Get meter attributes from first staffDef
-                    meter_count = first_staff_def.get('meter.count')
-                    meter_unit = first_staff_def.get('meter.unit')
-                    
-                    if meter_count and meter_unit:
-                        # Add meter attributes to scoreDef
-                        score_def.set('meter.count', meter_count)
-                        score_def.set('meter.unit', meter_unit)
-                        
-                        # Remove meter attributes from all staffDefs in this scoreDef
-                        staff_defs = score_def.findall('.//mei:staffDef', namespaces=ns)
-                        for staff_def in staff_defs:
-                            staff_def.attrib.pop('meter.count', None)
-                            staff_def.attrib.pop('meter.unit', None)
-        
-        # add time signature information to scoreDef for JRP meterSig codings
-        if correct_jrp_time_signatures:
-            score_defs = root.findall('.//mei:scoreDef', namespaces=ns)
-            count = len(score_defs)
-            print(f"Found {count} scoreDef elements to process.")
-            
-            for score_def in score_defs:
-                # Find the first staffDef in this scoreDef
-                meterSig = score_def.find('.//mei:meterSig', namespaces=ns)
-                
-                if meterSig is not None:
-                    # Get meter attributes from first staffDef
-                    meter_count = meterSig.get('count')
-                    meter_unit = meterSig.get('unit')
-                    
-                    if meter_count and meter_unit:
-                        # Add meter attributes to scoreDef
-                        score_def.set('meter.count', meter_count)
-                        score_def.set('meter.unit', meter_unit)
-                                     
-        # fix mrests under 3/1
-        if correct_mrests:
-            # First pass: identify which measures should be processed
-            # Build a parent map for efficient parent lookup
-            parent_map = {c: p for p in root.iter() for c in p}
-            # set counter
-            mRest_counter = 0
-            
-            # First: find all scoreDef and measure elements in document order
-            elements = []
-            for element in root.iter():
-                if element.tag == f"{{{ns['mei']}}}scoreDef" or element.tag == f"{{{ns['mei']}}}measure":
-                    elements.append(element)
-            
-            # Track which measures should be processed
-            measures_to_process = set()
-            current_meter_valid = False
-            
-            # Process elements in document order
-            for element in elements:
-                if element.tag == f"{{{ns['mei']}}}scoreDef":
-                    # Check if this scoreDef has the required meter attributes
-                    meter_count = element.get('meter.count')
-                    meter_unit = element.get('meter.unit')
-                    
-                    if meter_count == '3' and meter_unit == '1':
-                        current_meter_valid = True
-                        # Fix the f-string syntax
-                        xml_id = element.get(f"{{{ns['xml']}}}id")
-                        print(f"Found scoreDef with meter.count=3 and meter.unit=1")
-                    elif meter_count is not None or meter_unit is not None:
-                        # Any other scoreDef with meter attributes resets our context
-                        current_meter_valid = False
-                
-                elif element.tag == f"{{{ns['mei']}}}measure" and current_meter_valid:
-                    # If we're in a valid meter context, mark this measure for processing
-                    measure_id = element.get(f"{{{ns['xml']}}}id")
-                    if measure_id:
-                        measures_to_process.add(measure_id)
-                        # print(f"Adding measure {measure_id} to processing list")
-            
-            print(f"Found {len(measures_to_process)} 3/1 measures check for mRests.")
-            
-            # Process each identified measure
-            for measure_id in measures_to_process:
-                # Find the measure by ID
-                measure = root.find(f'.//mei:measure[@xml:id="{measure_id}"]', namespaces=ns)
-                if measure is None:
-                    continue
-                
-                # Find all mRest elements in this measure
-                mrests = measure.findall('.//mei:mRest', namespaces=ns)
-                # print(f"Found {len(mrests)} mRest elements in measure {measure_id}.")
-                
-                for mrest in mrests:
-                    # Use the parent map to find the parent layer of this mRest
-                    if mrest not in parent_map:
-                        continue
-                        
-                    parent = parent_map[mrest]
-                    
-                    # Find the layer that contains this mRest
-                    layer = parent
-                    while layer is not None and not layer.tag.endswith('layer'):
-                        if layer in parent_map:
-                            layer = parent_map[layer]
-                        else:
-                            layer = None
-                    
-                    if layer is None:
-                        xml_id = mrest.get(f"{{{ns['xml']}}}id")
-                        # print(f"Warning: Could not find layer for mRest {xml_id}")
-                        continue
-                    
-                    # Get the original mRest ID
-                    mrest_id = mrest.get(f"{{{ns['xml']}}}id")
-                    if not mrest_id:
-                        continue          
-                    # print(f"Processing mRest {mrest_id}")
-                    
-                    # Find the index where we should insert the new rests
-                    if parent is layer:
-                        for i, child in enumerate(layer):
-                            if child is mrest:
-                                insert_index = i
-                                break
-                        else:
-                            insert_index = len(layer)
-                    else:
-                        insert_index = len(layer)
-                    
-                    # Create multiple rest elements
-                    for i in range(3):
-                        # Create a new rest element and set attributes
-                        rest = etree.Element(f"{{{ns['mei']}}}rest")
-                        rest.set(f"{{{ns['xml']}}}id", f"{mrest_id}{chr(97 + i)}")
-                        rest.set('dur', '1')
-                        rest.set('dur.ppq', '1024')
-                        
-                        # Insert the rest into the layer
-                        layer.insert(insert_index + i, rest)
-                        # print(f"Created rest {mrest_id}{chr(97 + i)}")
-                    
-                    # Remove the original mRest from its parent
-                    parent.remove(mrest)
-                    mRest_counter +=1
-                    # print(f"Removed mRest {mrest_id}")
-                    
-                    # Update the parent map since we've modified the tree
-                    parent_map = {c: p for p in root.iter() for c in p}
-            print(f"Corrected {mRest_counter} mRests")
-    
-        #  Remove chord elements
-        if remove_chord:
-            chords = root.findall('.//mei:chord', namespaces=ns)
-            count = len(chords)
-            print(f"Found {count} chord elements to remove.")
-
-            for chord in chords:
-                parent = chord.getparent()
-                parent.remove(chord)
-
-        # check for chord elements
-        if check_for_chords:
-            chords = root.findall('.//mei:chord', namespaces=ns)
-            count = len(chords)
-            for chord in chords:
-                parent = chord.getparent()
-                measure_number = parent.get('n')
-
-                print(f"Chord element found in measure {measure_number}" )
-        
-        # Remove Senfl edition brackets
-        if remove_senfl_bracket:
-            brackets = root.findall('.//mei:line[@type="bracket"]', namespaces=ns)
-            count = len(brackets)
-            print(f"Found {count} bracket elements to remove.")
-            for bracket in brackets:
-                parent = bracket.getparent()
-                parent.remove(bracket)
-        
-        # Remove empty verse elements
-        if remove_empty_verse:
-            # Find all parent elements that might contain verses
-            for parent in root.findall('.//mei:syllable', namespaces=ns):
-                # Find all verses within this parent
-                verses = parent.findall('mei:verse', namespaces=ns)
-                # Create a list of verses to keep
-                verses_to_keep = []
-                for verse in verses:
-                    if list(verse):  # If verse has children
-                        verses_to_keep.append(verse)
-                
-                # If we found empty verses, clear the parent and add back only non-empty verses
-                if len(verses_to_keep) < len(verses):
-                    # Remove all verses from parent
-                    for verse in verses:
-                        parent.remove(verse)
-                    # Add back only non-empty verses
-                    for verse in verses_to_keep:
-                        parent.append(verse)
-        
-        # Remove all lyrics
-        if remove_lyrics:
-            verses = root.findall('.//mei:verse', namespaces=ns)
-            count = len(verses)
-            print(f"Found {count} lyric elements to remove.")
-            for verse in verses:
-                parent = verse.getparent()
-                parent.remove(verse)
-        
-        # fix elisions
-        if fix_elisions:
-            verses = root.findall('.//mei:verse', namespaces=ns)
-            for verse in verses:
-                # Set all v numbers to 1
-                verse.set('n', '1')
-                
-                # Find all syl elements
-                syllables = verse.findall('.//mei:syl', namespaces=ns)
-                
-                # Check if there are more than one syl elements
-                if len(syllables) > 1:
-                    print(f"Found elided syllables to correct.")
-                    
-                    # Get the text of the first and second syllables
-                    first_syllable = syllables[0].text or ""
-                    second_syllable = syllables[1].text or ""
-                    
-                    # Concatenate the text with "=" as separator
-                    new_text = f"{first_syllable}={second_syllable}"
-                    
-                    # Update the text of the first syllable
-                    syllables[0].text = new_text
-                    
-                    # Set attributes for the first syllable
-                    syllables[0].set('con', 'd')
-                    syllables[0].set('wordpos', 'm')
-                    
-                    # Remove the second syllable
-                    parent = syllables[1].getparent()
-                    parent.remove(syllables[1])
-
-        # fix musescore elisions 
-        if fix_musescore_elisions:
-            syllables = root.xpath('.//mei:syl', namespaces=ns)
-            # check for syllables with con="b" (which are the elided ones)
-            sylls_to_fix = [syl for syl in syllables if syl.get('con') == 'b'] 
-            print(f"Found {len(sylls_to_fix)} elided syllables to correct in Musescore MEI.")
-            # change con="b" to con="d" and wordpos="m" so the first syllable is correct
-            for syllable in syllables:
-                if syllable.get('con') == 'b':
-                    syllable.set('con', 'd')
-                    syllable.set('wordpos', 'm')
-                    
-                    # Now modify the next syllable to add underscore after first character, via parent layer
-                    current_layers = syllable.xpath('ancestor::mei:layer', namespaces=ns)
-                    if current_layers:
-                        current_layer = current_layers[0]
-                        all_syllables = current_layer.xpath('.//mei:syl', namespaces=ns)
-                        
-                        try:
-                            current_index = all_syllables.index(syllable)
-                            if current_index < len(all_syllables) - 1:
-                                # here is the _next syllable_, which is the one with the real elision
-                                next_syl = all_syllables[current_index + 1]
-                                if next_syl.text and len(next_syl.text) > 1:
-                                    original = next_syl.text
-                                    # replace the combining breve if present (which is \u035c) with underscore
-                                    next_syl.text = next_syl.text.replace("\u035c", "_") 
-                                    print(f"Modified: '{original}' → '{next_syl.text}'")
-                        except (ValueError, IndexError) as e:
-                            print(f"Warning: Could not process syllable index: {e}")
-                    else:
-                        print(f"Warning: No layer ancestor found for syllable {syllable.get('xml:id')}")
-        
-        # Replace slurs with ties
-        if slur_to_tie:
-            slurs = root.findall('.//mei:slur', namespaces=ns)
-            count = len(slurs)
-            print(f"Found {count} slurs to correct as ties.")
-            for slur in slurs:
-                # Remove specific attributes
-                for attr in ['layer', 'tstamp', 'tstamp2', 'staff']:
-                    if attr in slur.attrib:
-                        del slur.attrib[attr]
-                
-                # Change element name to 'tie'
-                slur.tag = f"{{{ns['mei']}}}tie"
-
-        #  combine layers
-        if collapse_layers:
-
-            staves = root.findall('.//mei:staff', namespaces=ns)
-            for staff in staves:
-                layers = staff.findall('.//mei:layer', namespaces=ns)
-                for layer in layers:
-                    if layer.get('n') != '1':  # Only process non-layer-1 elements
-                        target_layer = staff.find('.//mei:layer[@n="1"]', namespaces=ns)
-                        if target_layer is not None:
-                            if layer.text or len(layer) > 0:  # Check for any content
-                                # Move all children to target layer
-                                for child in list(layer):
-                                    target_layer.append(child)
-                                # Remove the empty layer
-                                layer.getparent().remove(layer)
-                            
-        # correct red accidental notes as supplied
-        if correct_ficta:
-            # remove 'dir' tags - try both with and without namespace
-            dir_tags = root.findall('.//dir', namespaces=ns) + root.findall('.//mei:dir', namespaces=ns)
-            print(f"Found {len(dir_tags)} dir tags to remove")
-            for tag in dir_tags:
-                tag.getparent().remove(tag)
-        
-            # Try both approaches to find notes with color attributes
-            color_notes = root.findall('.//mei:note[@color]', namespaces=ns)
-            color_count = len(color_notes) 
-            print(f"Found {color_count} total color notes to correct as supplied.")
-            
-            if color_count > 0:
-                for note in color_notes:
-                    # Try both namespace approaches for finding accid elements
-                    accid = note.find('mei:accid', namespaces=ns)
-                    
-                    if accid is not None:
-                        # Handle accid.ges attributes
-                        if 'accid.ges' in accid.attrib:
-                            accid.set('accid', accid.get('accid.ges'))
-                            del accid.attrib['accid.ges']
-                            # print('deleted accid.ges')
-                        
-                        # Remove color attribute
-                        del note.attrib['color']
-                        # print('deleted color')
-                        
-                        # Get accid value
-                        accid_value = accid.get('accid')
-                        
-                        # Generate unique IDs
-                        note_random_id = random.randint(1000000, 9999999)
-                        accid_random_id = random.randint(1000000, 9999999)
-                        
-                        # ns for xml ids
-                        XML_NS = 'http://www.w3.org/XML/1998/namespace'
-
-                        # Create new supplied parent tag
-                        supplied_tag = etree.SubElement(
-                            note, 
-                            'supplied',
-                            attrib={
-                                'reason': 'edit',
-                                f'{{{XML_NS}}}id': f"m-{note_random_id}"  # Use Clark notation for xml:id
-                            }
-                        )
-                        
-                    
-                        # Update the accid tag creation
-                        new_accid_tag = etree.SubElement(
-                            supplied_tag, 
-                            'accid',
-                            attrib={
-                                'accid': accid_value,
-                                'func': "edit",
-                                'place': "above",
-                                f'{{{XML_NS}}}id': f"m-{accid_random_id}"  # Use Clark notation for xml:id
-                            }
-                        )
-                        
-                        # Replace old accid tag with new structure
-                        note.remove(accid)
-                        # print("updated note with new supplied accidental")
-                        
-        # fix voice labels
-        if voice_labels:
-            # revert staffDef/label to staffDef/@label
-            staffDefs = root.findall('.//mei:staffDef', namespaces=ns)
-            count = len(staffDefs)
-            print(f"Found {count} staff labels to correct.")
-            
-            for staffDef in staffDefs:
-                label_elem = staffDef.find('mei:label', namespaces=ns)
-                if label_elem is not None and label_elem.text:
-                    staffDef.set('label', label_elem.text)
-        
-        
-        # save the result
+        parsed = time.perf_counter()
+        self.timings['parse'] = parsed - started
+
+        # Apply every enabled correction in a single walk over the tree
+        self._run_steps(root, {
+            'remove_incipit': remove_incipit,
+            'remove_incipit_leuven': remove_incipit_leuven,
+            'remove_pb': remove_pb,
+            'remove_sb': remove_sb,
+            'remove_annotation': remove_annotation,
+            'resolve_multibar_ties': resolve_multibar_ties,
+            'remove_dir': remove_dir,
+            'remove_ligature_bracket': remove_ligature_bracket,
+            'remove_variants': remove_variants,
+            'remove_anchored_text': remove_anchored_text,
+            'remove_timestamp': remove_timestamp,
+            'correct_cmme_time_signatures': correct_cmme_time_signatures,
+            'correct_jrp_time_signatures': correct_jrp_time_signatures,
+            'correct_mrests': correct_mrests,
+            'remove_chord': remove_chord,
+            'check_for_chords': check_for_chords,
+            'remove_senfl_bracket': remove_senfl_bracket,
+            'remove_empty_verse': remove_empty_verse,
+            'remove_lyrics': remove_lyrics,
+            'fix_elisions': fix_elisions,
+            'fix_musescore_elisions': fix_musescore_elisions,
+            'slur_to_tie': slur_to_tie,
+            'collapse_layers': collapse_layers,
+            'correct_ficta': correct_ficta,
+            'voice_labels': voice_labels,
+        }, log)
+        transformed = time.perf_counter()
+        self.timings['steps'] = transformed - parsed
+
+        # save the result, streamed straight from the working tree
         output_file_path = os.path.join(output_folder, revised_name)
+        write_mei(root, output_file_path)
+        self.timings['write'] = time.perf_counter() - transformed
         
-        # Get the MEI namespace
-        mei_ns = "http://www.music-encoding.org/ns/mei"
-        
-        # Get the meiversion attribute from the root
-        meiversion = root.get("meiversion", "4.0.0")
-        xml_id = root.get("{http://www.w3.org/XML/1998/namespace}id", "m-1")
-        
-        # Convert to string and parse with lxml for better control
-        # xml_string = ET.tostring(root)
-        xml_string = etree.tostring(root)
-        parser = etree.XMLParser(remove_blank_text=True)
-        root_lxml = etree.fromstring(xml_string, parser)
-        
-        # Create a new XML tree with the proper namespace setup
-        new_root = etree.Element("mei", 
-                                nsmap={None: mei_ns},  # Default namespace without prefix
-                                attrib={"meiversion": meiversion,
-                                        "{http://www.w3.org/XML/1998/namespace}id": xml_id})
-        
-        # Copy the content from the original tree
-        for child in root_lxml:
-            new_root.append(child)
-        
-        # Remove namespace prefixes from all elements except the root
-        for elem in new_root.iter():
-            if elem is not new_root:  # Skip the root element
-                if not hasattr(elem.tag, 'find') or elem.tag.find('}') == -1:
-                    continue
-                elem.tag = elem.tag.split('}', 1)[1]  # Remove namespace prefix
-        
-        # Format the XML with proper indentation
-        etree.indent(new_root, space="    ")
-        
-        # Serialize to string with XML declaration
-        formatted_xml = etree.tostring(
-            new_root,
-            pretty_print=True,
-            encoding='utf-8',
-            xml_declaration=True
-        )
-        
-        # Write to file
-        with open(output_file_path, 'wb') as f:
-            f.write(formatted_xml)
-        
-        print(f'Saved updated {revised_name}')
-        return formatted_xml
+        log.info(f'Saved updated {revised_name}')
+        return output_file_path
 
+    def process_document(self, document, **flags):
+        """
+        Apply the music feature corrections to a document held in memory
+        and return it, without reading or writing any file.
+
+        Parameters
+        ----------
+        document : MEI_Document
+            The document to correct (or bytes, an lxml tree or root, or a
+            path; see MEI_Document.load()).  Its tree is edited in place.
+        **flags
+            Any of the process_music_features() feature flags, with the
+            same defaults, e.g. remove_incipit=False.
+
+        Afterwards self.report, self.events and self.mrest_stats describe
+        the run, as for process_music_features(); self.timings has the
+        'steps' time only.
+        """
+        defaults = _feature_flag_defaults()
+        unknown = sorted(set(flags) - set(defaults))
+        if unknown:
+            raise TypeError(f"process_document() got unknown feature flags: {', '.join(unknown)}")
+        document = MEI_Document.load(document)
+        log = MEI_Event_Log(self.log_level)
+        self.events = log.events
+        self.timings = {}
+        self.report = []
+        started = time.perf_counter()
+        self._run_steps(document.root, {**defaults, **flags}, log)
+        self.timings['steps'] = time.perf_counter() - started
+        return document
+
+    def _run_steps(self, root, enabled, log):
+        """Apply the *enabled* feature steps to *root* and keep their report."""
+        doc = run_feature_steps(root, enabled, log, survey=self.survey)
+        self.mrest_stats = doc.stats.get('correct_mrests')
+        self.report = doc.report
+        self.tags_present = doc.tags_present
+
+    def process_corpus(self, paths_or_folder, output_folder, workers=None,
+                       chunksize=1, ordered=True, incremental=False, **flags):
+        """
+        Run process_music_features() over many files, spread across a
+        pool of worker processes.
+
+        Parameters
+        ----------
+        paths_or_folder : str or iterable of str
+            A folder (every *.mei file in it is processed, in sorted order)
+            or MEI file paths: a list, or a lazy iterator such as
+            mei_discovery.find_mei_files(folder, recursive=True), whose
+            files are handed to the workers while it is still walking.
+        output_folder : str
+            Folder that receives the *_rev.mei files.
+        workers : int, optional
+            Number of worker processes (default: one per CPU).  With
+            workers=1 the files are processed in this process, one by one.
+        chunksize : int, optional
+            Number of files handed to a worker at a time.  Larger chunks
+            lower the scheduling overhead for big corpora of small files.
+        ordered : bool, optional
+            If True (default) results come back in input order; if False
+            they come back as soon as each file finishes.
+        incremental : bool, optional
+            If True, skip files whose output would not change.  A manifest
+            in the output folder (see mei_feature_manifest) records each
+            input's content hash, the flags and the mei_tools version; a
+            file is processed again only if its content or the version
+            changed, its output is gone, or a changed flag concerns a
+            step that has something to do in it.  Skipped files get the
+            status 'unchanged'.
+        **flags
+            Any of the process_music_features() feature flags, e.g.
+            remove_incipit=False.  They apply to every file.
+
+        Returns
+        -------
+        list of Corpus_File_Result
+            One record per file, with its status ('ok', 'unchanged' or
+            'error'), timings and counters.
+
+        Example:
+
+        processor = MEI_Music_Feature_Processor()
+        results = processor.process_corpus('D_mei_with_updated_metadata',
+                                           'E_mei_with_updated_music_features',
+                                           workers=8, remove_incipit=False)
+        failed = [r for r in results if r.status == 'error']
+        """
+        accepted = inspect.signature(self.process_music_features).parameters
+        unknown = sorted(set(flags) - set(accepted) - {'mei_path', 'output_folder'})
+        if unknown:
+            raise TypeError(f"process_corpus() got unknown feature flags: {', '.join(unknown)}")
+
+        mei_paths = _corpus_paths(paths_or_folder)
+        os.makedirs(output_folder, exist_ok=True)
+        manifest = None
+        manifest_flags = None
+        if incremental:
+            manifest = Feature_Manifest.load(output_folder)
+            manifest_flags = {name: bool(value) for name, value
+                              in {**_feature_flag_defaults(), **flags}.items()}
+        jobs = ((mei_path, output_folder, self.log_level, flags, manifest_flags,
+                 manifest.get(_output_name(mei_path)) if manifest is not None else None)
+                for mei_path in mei_paths)
+        workers = _pool_size(workers, mei_paths)
+
+        results = []
+        try:
+            if workers == 1:
+                self._collect(map(_process_corpus_file, jobs), results, manifest)
+            else:
+                with multiprocessing.Pool(workers) as pool:
+                    run = pool.imap if ordered else pool.imap_unordered
+                    self._collect(run(_process_corpus_file, jobs, chunksize), results, manifest)
+        finally:
+            # keep what was done so far, even if the run is interrupted
+            if manifest is not None:
+                manifest.save()
+        return results
+
+    def scan_corpus(self, paths_or_folder, report_folder=None, workers=None, chunksize=1):
+        """
+        Look for the features the corrections act on, without changing or
+        writing any MEI file, so a corpus can be triaged before choosing
+        flags.
+
+        Every file is parsed and walked once; the detectors in
+        mei_feature_scan.DETECTORS (chords, mRests in 3/1, incipits,
+        variants, slurs, ficta, multi-bar ties, empty verses, elisions)
+        record where each feature occurs.
+
+        Parameters
+        ----------
+        paths_or_folder : str or iterable of str
+            A folder or MEI file paths, as for process_corpus().
+        report_folder : str, optional
+            If given, scan_report.json, scan_files.csv and
+            scan_features.csv are written there (see
+            mei_feature_scan.write_scan_report()).
+        workers : int, optional
+            Number of worker processes (default: one per CPU).
+        chunksize : int, optional
+            Number of files handed to a worker at a time.
+
+        Returns
+        -------
+        list of Corpus_Scan_Result
+            One record per file, in input order, with its status and
+            findings (feature name → measure numbers).
+
+        Example:
+
+        results = processor.scan_corpus('D_mei_with_updated_metadata',
+                                         report_folder='scan_report')
+        with_chords = [r.mei_path for r in results if r.findings.get('chords')]
+        """
+        mei_paths = _corpus_paths(paths_or_folder)
+        workers = _pool_size(workers, mei_paths)
+        if workers == 1:
+            results = [scan_file(mei_path) for mei_path in mei_paths]
+        else:
+            with multiprocessing.Pool(workers) as pool:
+                results = list(pool.imap(scan_file, mei_paths, chunksize))
+        if report_folder is not None:
+            write_scan_report(results, report_folder)
+        return results
+
+    def _collect(self, outcomes, results, manifest):
+        """Append process_corpus() *outcomes* to *results*, recording them in *manifest*."""
+        for result in outcomes:
+            results.append(result)
+            if manifest is not None:
+                manifest.update(_output_name(result.mei_path), result.manifest_entry)
+
+
+def _corpus_paths(paths_or_folder):
+    """Return the MEI files named by a folder, a single path or an iterable of paths."""
+    if isinstance(paths_or_folder, str) and os.path.isdir(paths_or_folder):
+        return find_mei_files(paths_or_folder)
+    if isinstance(paths_or_folder, str):
+        return [paths_or_folder]
+    return paths_or_folder
+
+
+def _pool_size(workers, mei_paths):
+    """Return the number of worker processes to use for *mei_paths*."""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if isinstance(mei_paths, (list, tuple)):
+        workers = min(workers, len(mei_paths))
+    return max(1, workers)
+
+
+def _output_name(mei_path):
+    """Return the name process_music_features() gives the output of *mei_path*."""
+    return mei_file_stem(os.path.basename(mei_path)) + "_rev.mei"
+
+
+def _feature_flag_defaults():
+    """Return the process_music_features() feature flags and their defaults."""
+    parameters = inspect.signature(MEI_Music_Feature_Processor.process_music_features).parameters
+    return {name: parameter.default for name, parameter in parameters.items()
+            if parameter.default is not inspect.Parameter.empty}
+
+
+class Corpus_File_Result:
+    """Outcome of processing one file in MEI_Music_Feature_Processor.process_corpus()."""
+
+    def __init__(self, mei_path):
+        self.mei_path = mei_path
+        self.output_path = None
+        self.status = 'ok'          # 'ok', 'unchanged' (incremental runs) or 'error'
+        self.error = None           # error message when status is 'error'
+        self.seconds = 0.0          # wall time for the whole file
+        self.timings = {}           # seconds spent in parse / steps / write
+        self.counters = {}          # per-step counters, e.g. mrests_split
+        self.report = []            # Transform_Report for every transform applied
+        self.events = []            # (level, message) events logged for the file
+        self.manifest_entry = None  # manifest record, in incremental runs
+
+    def __repr__(self):
+        return (f'Corpus_File_Result({os.path.basename(self.mei_path)!r}, '
+                f'status={self.status!r}, seconds={self.seconds:.3f})')
+
+
+def _process_corpus_file(job):
+    """Worker for process_corpus(): process one file and describe the outcome."""
+    mei_path, output_folder, log_level, flags, manifest_flags, recorded = job
+    result = Corpus_File_Result(mei_path)
+    processor = MEI_Music_Feature_Processor(log_level)
+    started = time.perf_counter()
+    try:
+        if manifest_flags is not None:
+            digest = file_sha256(mei_path)
+            output_path = os.path.join(output_folder, _output_name(mei_path))
+            if (recorded is not None and os.path.exists(output_path)
+                    and entry_is_current(recorded, digest, manifest_flags)):
+                result.status = 'unchanged'
+                result.output_path = output_path
+                result.manifest_entry = dict(recorded, input=mei_path, flags=manifest_flags)
+                result.seconds = time.perf_counter() - started
+                return result
+            processor.survey = True
+        outcome = processor.process_music_features(mei_path, output_folder, **flags)
+    except Exception as e:
+        result.status = 'error'
+        result.error = f'{type(e).__name__}: {e}'
+    else:
+        if outcome.startswith('Error:'):
+            result.status = 'error'
+            result.error = outcome
+        else:
+            result.output_path = outcome
+            if manifest_flags is not None:
+                result.manifest_entry = make_entry(mei_path, digest, manifest_flags,
+                                                   processor.report, processor.tags_present)
+    result.seconds = time.perf_counter() - started
+    result.timings = dict(processor.timings)
+    result.report = processor.report
+    result.events = processor.events
+    if processor.mrest_stats is not None:
+        result.counters.update(vars(processor.mrest_stats))
+    return result
@@ -0,0 +1,172 @@
+"""
+mei_reader.py
+=============
+Shared MEI file reader for the metadata tools.
+
+Sibelius exports MEI as UTF-16 with a byte-order mark.  The tools used to
+read such a file whole, decode it to a str, patch the encoding in the XML
+declaration and encode it back to UTF-8 before parsing, holding three
+full copies of the document in memory.
+
+parse_mei() instead hands the file to lxml, whose parser decodes
+BOM-marked UTF-16 (and UTF-8) natively while it reads.  Only if that
+fails for a UTF-16 file is the file transcoded to UTF-8, one chunk at a
+time, and fed to an incremental parser, so no whole-file copy is ever
+built.  With header_only=True, parsing (and any transcoding) stops at the
+closing </meiHead> tag.
+
+read_mei_bytes() returns the UTF-8 bytes of a file, or of just its first
+*limit* bytes, for callers that need text rather than a tree, and
+parse_mei_bytes() parses a document already held in memory.
+
+Files whose name ends in .gz are decompressed on the fly.
+"""
+
+import re
+import gzip
+import codecs
+from lxml import etree
+
+MEI_HEAD = '{http://www.music-encoding.org/ns/mei}meiHead'
+
+# Size of the blocks read from disk when transcoding
+CHUNK_SIZE = 1 << 20
+
+_UTF16_BOMS = (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)
+
+# The encoding named in a leading XML declaration
+_DECLARED_ENCODING = re.compile(r'''^(\s*<\?xml[^>]*?\bencoding\s*=\s*)(["'])[^"']*\2''')
+
+
+def open_mei(filepath):
+    """Open *filepath* for reading bytes, decompressing it if it ends in .gz."""
+    if filepath.lower().endswith('.gz'):
+        return gzip.open(filepath, 'rb')
+    return open(filepath, 'rb')
+
+
+def has_utf16_bom(filepath):
+    """Return True if *filepath* starts with a UTF-16 byte-order mark."""
+    with open_mei(filepath) as fh:
+        return fh.read(2) in _UTF16_BOMS
+
+
+def _utf16_chunks(filepath, limit=None):
+    """
+    Yield the content of the BOM-marked UTF-16 file *filepath* as UTF-8
+    bytes, one chunk at a time, with the XML declaration's encoding
+    changed to UTF-8.  With *limit*, only the first *limit* bytes of the
+    file are read (a character split by the limit is dropped).
+    """
+    decoder = codecs.getincrementaldecoder('utf-16')()
+    remaining = limit
+    first = True
+    with open_mei(filepath) as fh:
+        while True:
+            size = CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining)
+            block = fh.read(size) if size else b''
+            if remaining is not None:
+                remaining -= len(block)
+            last = not block
+            text = decoder.decode(block, final=last and limit is None)
+            if first and text:
+                text = _DECLARED_ENCODING.sub(r'\1\2UTF-8\2', text, count=1)
+                first = False
+            if text:
+                yield text.encode('utf-8')
+            if last:
+                return
+
+
+def read_mei_bytes(filepath, limit=None):
+    """
+    Return the content of an MEI file as UTF-8 bytes.
+
+    Parameters
+    ----------
+    filepath : str
+        Path of the MEI file.  UTF-16 files (with a BOM, as written by
+        Sibelius) are transcoded chunk by chunk and their XML declaration
+        is changed to UTF-8; all other files are returned unchanged.
+    limit : int, optional
+        Read only the first *limit* bytes of the file, e.g. to look at
+        its header without reading the music.
+    """
+    if has_utf16_bom(filepath):
+        return b''.join(_utf16_chunks(filepath, limit))
+    with open_mei(filepath) as fh:
+        return fh.read() if limit is None else fh.read(limit)
+
+
+def _trim_to_head(head):
+    """Return the <mei> root holding *head*, without anything parsed after it."""
+    root = head.getparent()
+    if root is None:
+        return head
+    # Drop whatever the parser had already started after the header
+    while head.getnext() is not None:
+        root.remove(head.getnext())
+    # A parse stopped early leaves the document without an encoding, and
+    # lxml then writes non-ASCII attribute values as character references.
+    # Re-reading the (small) header gives a tree that serializes like a
+    # full parse.
+    return etree.fromstring(etree.tostring(root))
+
+
+def _read_mei_head(filepath):
+    """
+    Parse *filepath* only as far as the closing </meiHead> tag.
+
+    Returns the <mei> root element holding its attributes and the complete
+    meiHead subtree, and nothing after it; the music body is never parsed.
+    A file without a meiHead is parsed in full.
+    """
+    with open_mei(filepath) as fh:
+        context = etree.iterparse(fh, events=('end',), tag=MEI_HEAD)
+        for _event, head in context:
+            return _trim_to_head(head)
+        return context.root
+
+
+def _parse_transcoded(filepath, header_only=False):
+    """Parse a UTF-16 file by feeding it to lxml as UTF-8, chunk by chunk."""
+    parser = etree.XMLPullParser(events=('end',), tag=MEI_HEAD)
+    for chunk in _utf16_chunks(filepath):
+        parser.feed(chunk)
+        if header_only:
+            for _event, head in parser.read_events():
+                return _trim_to_head(head)
+    return parser.close()
+
+
+def parse_mei(filepath, header_only=False):
+    """
+    Parse an MEI file (UTF-8 or BOM-marked UTF-16) and return its root.
+
+    Parameters
+    ----------
+    filepath : str
+        Path of the MEI file.
+    header_only : bool
+        Stop at the closing </meiHead> tag and return the <mei> root with
+        only its attributes and meiHead; the music body is never parsed.
+    """
+    try:
+        if header_only:
+            return _read_mei_head(filepath)
+        return etree.parse(filepath).getroot()
+    except etree.XMLSyntaxError:
+        if not has_utf16_bom(filepath):
+            raise
+    return _parse_transcoded(filepath, header_only)
+
+
+def parse_mei_bytes(data):
+    """Parse an MEI document held in *data* (bytes, UTF-8 or BOM-marked UTF-16) and return its root."""
+    try:
+        return etree.fromstring(data)
+    except etree.XMLSyntaxError:
+        if data[:2] not in _UTF16_BOMS:
+            raise
+    text = _DECLARED_ENCODING.sub(r'\1\2UTF-8\2', data.decode('utf-16'), count=1)
+    return etree.fromstring(text.encode('utf-8'))
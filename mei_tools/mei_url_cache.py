@@ -0,0 +1,153 @@
+"""
+mei_url_cache.py
+================
+On-disk cache for CSV sources given as URLs, e.g. the Google Sheets
+"publish as CSV" links read by MEI_Metadata_Updater_Generic.load_csv().
+
+A response is streamed to a file in the cache folder, never held in
+memory whole, and read back from there.  Within *ttl* seconds of the last
+check the cached copy is used without contacting the server; after that
+the server is asked whether it changed (If-None-Match / If-Modified-Since
+with the ETag and Last-Modified it sent), and the body is only downloaded
+again if it did.  If the server cannot be reached, or answers with a
+server error (5xx), the cached copy is used, so a notebook keeps working
+offline.  A client error such as 404 or 403 is raised: the URL itself is
+wrong, and a stale copy would hide that.
+
+    cache = URL_Cache(ttl=600)
+    with cache.open(url) as fh:
+        for row in csv.DictReader(fh):
+            ...
+
+The cache lives in $XDG_CACHE_HOME/mei_tools/urls (~/.cache/... by
+default); each URL is stored as <sha256 of url>.body plus a .json file
+with its validators.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import http.client
+import urllib.error
+import urllib.request
+
+# Seconds a cached copy is used without asking the server again
+DEFAULT_TTL = 300
+
+# Size of the blocks copied from the response to disk
+CHUNK_SIZE = 64 * 1024
+
+
+def default_cache_dir():
+    """Return the folder URL_Cache uses when none is given."""
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'mei_tools', 'urls')
+
+
+class URL_Cache:
+    """
+    Fetch URLs through an on-disk cache with ETag / Last-Modified
+    revalidation.
+
+    Parameters
+    ----------
+    cache_dir : str, optional
+        Folder for the cached responses (default: default_cache_dir()).
+    ttl : float
+        Seconds after a download or successful check during which the
+        cached copy is used as is.  0 asks the server every time.
+    timeout : float
+        Seconds to wait for the server.
+
+    After each fetch, self.last_status tells where the content came from:
+    'fresh' (cached copy within ttl), 'not_modified' (server confirmed
+    the cached copy), 'downloaded', or 'offline' (server unreachable or
+    failing with a 5xx error, stale cached copy used).
+    """
+
+    def __init__(self, cache_dir=None, ttl=DEFAULT_TTL, timeout=30):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.ttl = ttl
+        self.timeout = timeout
+        self.last_status = None
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + '.body', base + '.json'
+
+    def _save_body(self, resp, body_path):
+        """Stream the response body to *body_path*, replacing it only when complete."""
+        fh = tempfile.NamedTemporaryFile(dir=self.cache_dir, delete=False)
+        try:
+            with fh:
+                shutil.copyfileobj(resp, fh, CHUNK_SIZE)
+            os.replace(fh.name, body_path)
+        except BaseException:
+            os.unlink(fh.name)
+            raise
+
+    def _write_meta(self, meta_path, meta):
+        with tempfile.NamedTemporaryFile('w', dir=self.cache_dir, delete=False,
+                                         encoding='utf-8') as fh:
+            json.dump(meta, fh)
+        os.replace(fh.name, meta_path)
+
+    def fetch(self, url):
+        """Return the path of an up-to-date local copy of *url*."""
+        body_path, meta_path = self._paths(url)
+        meta = None
+        if os.path.exists(body_path) and os.path.exists(meta_path):
+            with open(meta_path, encoding='utf-8') as fh:
+                meta = json.load(fh)
+            if time.time() - meta['checked'] < self.ttl:
+                self.last_status = 'fresh'
+                return body_path
+
+        request = urllib.request.Request(url)
+        if meta is not None:
+            if meta.get('etag'):
+                request.add_header('If-None-Match', meta['etag'])
+            if meta.get('last_modified'):
+                request.add_header('If-Modified-Since', meta['last_modified'])
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as resp:
+                self._save_body(resp, body_path)
+                meta = {
+                    'url': url,
+                    'etag': resp.headers.get('ETag'),
+                    'last_modified': resp.headers.get('Last-Modified'),
+                }
+                self.last_status = 'downloaded'
+        except urllib.error.HTTPError as exc:
+            # Checked before OSError, of which HTTPError is a subclass
+            if exc.code == 304 and meta is not None:
+                self.last_status = 'not_modified'
+            elif exc.code >= 500:
+                return self._fall_back(url, body_path, meta, exc)
+            else:
+                raise
+        except (OSError, http.client.HTTPException) as exc:
+            return self._fall_back(url, body_path, meta, exc)
+
+        meta['checked'] = time.time()
+        self._write_meta(meta_path, meta)
+        return body_path
+
+    def _fall_back(self, url, body_path, meta, exc):
+        """Use the stale cached copy of *url* after *exc*, if there is one."""
+        if meta is None:
+            raise exc
+        print(f'Could not refresh {url} ({exc}); using the copy cached '
+              f'{time.ctime(meta["checked"])}')
+        self.last_status = 'offline'
+        return body_path
+
+    def open(self, url, encoding='utf-8'):
+        """Return the content of *url* as a text file, ready for csv.reader()."""
+        return open(self.fetch(url), encoding=encoding, newline='')
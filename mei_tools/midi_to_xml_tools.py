@@ -5,7 +5,13 @@ import os
 import subprocess
 from pathlib import Path
 import sys
-import glob
+
+try:
+    from mei_tools.mei_discovery import find_files
+except ImportError:
+    # Run from a checkout as `python mei_tools/midi_to_xml_tools.py`,
+    # where this folder, not the package, is on sys.path
+    from mei_discovery import find_files
 
 # Display the current working directory (helpful for reference)
 print(f"Current working directory: {os.getcwd()}")
@@ -63,21 +69,19 @@ def convert_midi_to_musicxml(file_path):
         return False
 
 # Find all MIDI files in the source directory
-def find_midi_files(source_directory):
+def find_midi_files(source_directory, recursive=False):
     """
     Find all MIDI files in the specified directory
     
     Parameters:
     source_directory (str): Directory to search for MIDI files
+    recursive (bool): Also search its subdirectories
     
     Returns:
     list: List of paths to MIDI files
     """
-    # Use glob to find all .mid and .midi files
-    midi_files = glob.glob(os.path.join(source_directory, "*.mid"))
-    midi_files.extend(glob.glob(os.path.join(source_directory, "*.midi")))
-    
-    return midi_files
+    # Find all .mid and .midi files, in name order
+    return list(find_files(source_directory, (".mid", ".midi"), recursive=recursive))
 
 # Process all MIDI files in the directory
 def process_midi_files(source_directory):
@@ -121,12 +125,16 @@ if __name__ == "__main__":
 import os
 from pathlib import Path
 import xml.etree.ElementTree as ET
-import glob
 import shutil
 
-def load_musicxml_files(input_folder):
-    """Load all MusicXML files from the specified folder."""
-    files = glob.glob(os.path.join(input_folder, "*.musicxml"))
+try:
+    from mei_tools.mei_discovery import find_files
+except ImportError:
+    from mei_discovery import find_files
+
+def load_musicxml_files(input_folder, recursive=False):
+    """Load all MusicXML files from the specified folder (and its subfolders if recursive)."""
+    files = list(find_files(input_folder, ".musicxml", recursive=recursive))
     if not files:
         raise FileNotFoundError(f"No MusicXML files found in {input_folder}")
     return files
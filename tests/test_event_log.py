@@ -0,0 +1,38 @@
+"""Messages are printed only while the application has not configured logging."""
+
+import logging
+
+from mei_tools.mei_event_log import MEI_Event_Log, logger
+
+
+class _Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def test_prints_without_logging_configuration(capsys, monkeypatch):
+    # pytest's own capture handlers sit on the root logger
+    monkeypatch.setattr(logging.root, 'handlers', [])
+    log = MEI_Event_Log()
+    log.info('Found 2 chords')
+    log.debug('per-element detail')
+    assert capsys.readouterr().out == 'Found 2 chords\n'
+    assert log.events == [(logging.INFO, 'Found 2 chords'),
+                          (logging.DEBUG, 'per-element detail')]
+
+
+def test_configured_logging_gets_each_message_once(capsys, monkeypatch):
+    handler = _Collect()
+    monkeypatch.setattr(logging.root, 'handlers', [handler])
+    level = logger.level
+    logger.setLevel(logging.INFO)
+    try:
+        MEI_Event_Log().info('Found 2 chords')
+    finally:
+        logger.setLevel(level)
+    assert capsys.readouterr().out == ''
+    assert handler.messages == ['Found 2 chords']
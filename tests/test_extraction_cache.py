@@ -0,0 +1,49 @@
+"""The extraction cache checks size and mtime before it hashes a file."""
+
+import os
+
+from mei_tools import mei_extraction_cache
+from mei_tools.mei_extraction_cache import MEI_Extraction_Cache
+
+ROW = {'filename': 'a.mei', 'source_type': 'unknown'}
+
+
+def _cache_file(tmp_path):
+    path = str(tmp_path / 'a.mei')
+    with open(path, 'wb') as fh:
+        fh.write(b'<mei/>')
+    cache = MEI_Extraction_Cache(str(tmp_path / 'cache.sqlite'), verify_hash=True)
+    cache.store(cache.identity(path), 'generic', ROW)
+    return path, cache
+
+
+def _count_hashes(monkeypatch):
+    hashed = []
+    digest = mei_extraction_cache._file_digest
+    monkeypatch.setattr(mei_extraction_cache, '_file_digest',
+                        lambda path: hashed.append(path) or digest(path))
+    return hashed
+
+
+def test_unchanged_file_is_not_hashed(tmp_path, monkeypatch):
+    path, cache = _cache_file(tmp_path)
+    hashed = _count_hashes(monkeypatch)
+    assert cache.lookup(cache.identity(path), 'generic') == ROW
+    assert hashed == []
+
+
+def test_touched_file_keeps_its_row(tmp_path, monkeypatch):
+    path, cache = _cache_file(tmp_path)
+    os.utime(path, ns=(1, 1))
+    hashed = _count_hashes(monkeypatch)
+    assert cache.lookup(cache.identity(path), 'generic') == ROW
+    assert cache.lookup(cache.identity(path), 'generic') == ROW
+    assert hashed == [path]
+
+
+def test_edited_file_is_a_miss(tmp_path):
+    path, cache = _cache_file(tmp_path)
+    with open(path, 'wb') as fh:
+        fh.write(b'<mei></mei>')
+    assert cache.lookup(cache.identity(path), 'generic') is None
+    assert cache.misses == 1
@@ -0,0 +1,27 @@
+"""Manifest entries from other library versions or transform formats are stale."""
+
+from mei_tools.mei_feature_manifest import entry_is_current, library_version
+from mei_tools.mei_feature_transforms import TRANSFORM_FORMAT
+
+FLAGS = {'remove_pb': True}
+
+
+def _entry(**changes):
+    entry = {'sha256': 'abc', 'version': library_version(), 'format': TRANSFORM_FORMAT,
+             'flags': FLAGS, 'active': [], 'tags': []}
+    entry.update(changes)
+    return entry
+
+
+def test_matching_entry_is_current():
+    assert entry_is_current(_entry(), 'abc', FLAGS)
+
+
+def test_entry_from_released_2_0_4_is_stale():
+    entry = _entry(version='2.0.4')
+    del entry['format']
+    assert not entry_is_current(entry, 'abc', FLAGS)
+
+
+def test_entry_from_another_transform_format_is_stale():
+    assert not entry_is_current(_entry(format=TRANSFORM_FORMAT - 1), 'abc', FLAGS)
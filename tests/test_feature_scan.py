@@ -0,0 +1,86 @@
+"""Every location the scan flags is changed by the step it names."""
+
+import os
+
+import pytest
+from lxml import etree
+
+from mei_tools.mei_document import MEI_Document
+from mei_tools.mei_feature_scan import DETECTORS, scan_root
+from mei_tools.mei_feature_transforms import run_feature_steps
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NS = {'mei': 'http://www.music-encoding.org/ns/mei'}
+
+# One of each scanned feature: a Leuven incipit (also a label="0" incipit),
+# an mRest in 3/1, a chord, a three-note tie chain, a slur, a ficta note,
+# an empty verse, an elision and a MuseScore elision
+SCORE = '''<?xml version="1.0" encoding="UTF-8"?>
+<mei xmlns="http://www.music-encoding.org/ns/mei" meiversion="5.1">
+<music><body><mdiv><score>
+<scoreDef meter.count="2" meter.unit="1"><staffGrp><staffDef n="1" lines="5"/></staffGrp></scoreDef>
+<section>
+<pb/>
+<measure n="1" label="0" right="invis" xml:id="m1"><staff n="1"><layer n="1"><note xml:id="n1" pname="c" oct="4" dur="1"/></layer></staff></measure>
+<measure n="2" right="invis" xml:id="m2"><staff n="1"><layer n="1"><note xml:id="n2" pname="d" oct="4" dur="1"/></layer></staff></measure>
+<scoreDef meter.count="3" meter.unit="1"/>
+<measure n="3" xml:id="m3"><staff n="1"><layer n="1"><mRest xml:id="r3"/></layer></staff></measure>
+<measure n="4" xml:id="m4"><staff n="1"><layer n="1"><note xml:id="n4" pname="e" oct="4" dur="1"/><chord xml:id="c4"><note pname="c" oct="4"/><note pname="e" oct="4"/></chord></layer></staff><tie xml:id="t4" startid="#n4" endid="#n5"/></measure>
+<measure n="5" xml:id="m5"><staff n="1"><layer n="1"><note xml:id="n5" pname="e" oct="4" dur="1"/></layer></staff><tie xml:id="t5" startid="#n5" endid="#n6"/></measure>
+<measure n="6" xml:id="m6"><staff n="1"><layer n="1"><note xml:id="n6" pname="e" oct="4" dur="1"/><note xml:id="n7" pname="f" oct="4" dur="1"/></layer></staff><slur xml:id="s6" startid="#n6" endid="#n7"/></measure>
+<measure n="7" xml:id="m7"><staff n="1"><layer n="1"><note xml:id="n8" pname="b" oct="3" dur="1" color="red"><accid accid.ges="f"/></note><app><lem><note xml:id="n9" pname="a" oct="3" dur="1"/></lem></app></layer></staff></measure>
+<measure n="8" xml:id="m8"><staff n="1"><layer n="1">
+<note xml:id="n10" pname="g" oct="3" dur="1"><syllable><verse n="1"/><verse n="2"><syl>Ky</syl></verse></syllable></note>
+<note xml:id="n11" pname="a" oct="3" dur="1"><verse n="1"><syl>ri</syl><syl>e</syl></verse></note>
+<note xml:id="n12" pname="b" oct="3" dur="1"><verse n="1"><syl con="b">e</syl></verse></note>
+<note xml:id="n13" pname="c" oct="4" dur="1"><verse n="1"><syl>e&#x35c;lei</syl></verse></note>
+</layer></staff></measure>
+</section>
+</score></mdiv></body></music>
+</mei>
+'''
+
+SAMPLES = [
+    os.path.join(REPO, 'A_mei_to_process', 'Bach_BWV_0774.mei'),
+    os.path.join(REPO, 'Sample_files', 'sample_mei_files', '01B Alleluia a _test.mei'),
+]
+
+
+@pytest.fixture(params=['synthetic'] + SAMPLES, ids=os.path.basename)
+def mei_path(request, tmp_path):
+    if request.param != 'synthetic':
+        if not os.path.exists(request.param):
+            pytest.skip('sample file not in this checkout')
+        return request.param
+    path = str(tmp_path / 'features.mei')
+    with open(path, 'w', encoding='utf-8') as fh:
+        fh.write(SCORE)
+    return path
+
+
+def _located(root, location):
+    """Serialize the measures numbered *location*, or the element with that xml:id."""
+    elements = (root.xpath('//mei:measure[@n=$n]', namespaces=NS, n=location)
+                or root.xpath('//*[@xml:id=$id]', id=location))
+    return b''.join(etree.tostring(element) for element in elements)
+
+
+def test_transforms_change_every_flagged_location(mei_path):
+    findings = scan_root(MEI_Document.from_file(mei_path).root)
+    flagged = {name: locations for name, locations in findings.items() if locations}
+    assert flagged
+
+    for name, locations in flagged.items():
+        before = MEI_Document.from_file(mei_path).root
+        after = MEI_Document.from_file(mei_path).root
+        run_feature_steps(after, {DETECTORS[name].flags[0]: True})
+        for location in locations:
+            assert _located(after, location) != _located(before, location), (name, location)
+
+
+def test_synthetic_score_has_every_feature(tmp_path):
+    path = str(tmp_path / 'features.mei')
+    with open(path, 'w', encoding='utf-8') as fh:
+        fh.write(SCORE)
+    findings = scan_root(MEI_Document.from_file(path).root)
+    assert [name for name, locations in findings.items() if not locations] == []
@@ -0,0 +1,98 @@
+"""Header splicing writes the same header bytes as a full rewrite."""
+
+import os
+import re
+
+from lxml import etree
+
+from mei_tools import MEI_Metadata_Extractor, MEI_Metadata_Updater_Generic
+from mei_tools.mei_document import MEI_Document
+from mei_tools.mei_reader import parse_mei
+from mei_tools.mei_writer import write_mei
+
+SCORE = '''<?xml version="1.0" encoding="UTF-8"?>
+<mei xmlns="http://www.music-encoding.org/ns/mei" meiversion="5.1">
+<meiHead>
+<fileDesc>
+<titleStmt><title>Così sol d'una chiara fonte</title></titleStmt>
+<pubStmt><availability>Copyright André Vierendeels</availability></pubStmt>
+</fileDesc>
+<extMeta><metaFrame n="1" token="!!!OMD: Così sol d'una chiara fonte viva"/></extMeta>
+</meiHead>
+<music><body><mdiv><score><section><measure n="1"/></section></score></mdiv></body></music>
+</mei>
+'''
+
+
+def _head_bytes(path):
+    with open(path, 'rb') as fh:
+        return re.search(rb'<meiHead.*?</meiHead>', fh.read(), re.S).group(0)
+
+
+def _input_file(folder):
+    # Written by write_mei, so its layout matches a full rewrite
+    path = os.path.join(folder, 'cosi.mei')
+    write_mei(etree.fromstring(SCORE.encode('utf-8')), path)
+    return path
+
+
+def test_header_only_parse_keeps_non_ascii_attributes(tmp_path):
+    path = _input_file(str(tmp_path))
+    head = parse_mei(path, header_only=True)[0]
+    markup = etree.tostring(head, encoding='unicode')
+    assert 'token="!!!OMD: Così' in markup
+    assert '&#x' not in markup
+
+
+def test_splice_and_full_rewrite_headers_are_byte_equal(tmp_path):
+    path = _input_file(str(tmp_path))
+    row = MEI_Metadata_Extractor().extract_document(MEI_Document.from_file(path))
+    row['title'] = 'Così sol d’una chiara fonte'
+
+    outputs = {}
+    for splice_header in (False, True):
+        folder = str(tmp_path / ('splice' if splice_header else 'full'))
+        os.makedirs(folder)
+        updater = MEI_Metadata_Updater_Generic(splice_header=splice_header)
+        updater._update_file(path, row, folder)
+        outputs[splice_header] = _head_bytes(os.path.join(folder, 'cosi_rev.mei'))
+
+    full, spliced = outputs[False], outputs[True]
+    # the run timestamps differ by the second at most
+    stamp = re.compile(rb'isodate="[^"]*"')
+    assert stamp.sub(b'', spliced) == stamp.sub(b'', full)
+    assert 'Così'.encode('utf-8') in spliced
+    assert b'&#x' not in spliced
+
+
+ASCII_SCORE = '''<?xml version="1.0" encoding="US-ASCII"?>
+<mei xmlns="http://www.music-encoding.org/ns/mei" meiversion="5.1">
+    <meiHead>
+        <fileDesc>
+            <titleStmt>
+                <title>Cosi</title>
+            </titleStmt>
+        </fileDesc>
+    </meiHead>
+    <music><body><mdiv><score><section><measure n="1"/></section></score></mdiv></body></music>
+</mei>
+'''
+
+
+def test_splice_into_ascii_file_writes_character_references(tmp_path):
+    path = str(tmp_path / 'cosi.mei')
+    with open(path, 'w', encoding='ascii') as fh:
+        fh.write(ASCII_SCORE)
+    row = MEI_Metadata_Extractor().extract_document(MEI_Document.from_file(path))
+    row['title'] = 'Così'
+
+    folder = str(tmp_path / 'splice')
+    os.makedirs(folder)
+    MEI_Metadata_Updater_Generic(splice_header=True)._update_file(path, row, folder)
+    output = os.path.join(folder, 'cosi_rev.mei')
+    with open(output, 'rb') as fh:
+        data = fh.read()
+    data.decode('ascii')
+    assert data.startswith(b'<?xml version="1.0" encoding="US-ASCII"?>')
+    title = parse_mei(output).find('.//{http://www.music-encoding.org/ns/mei}title')
+    assert title.text == 'Così'
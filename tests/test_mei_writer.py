@@ -0,0 +1,51 @@
+"""write_mei() writes the same bytes as the libxml2 save path it replaced."""
+
+import pytest
+from lxml import etree
+
+from mei_tools.mei_writer import write_mei
+
+MEI_NS = 'http://www.music-encoding.org/ns/mei'
+XML_ID = '{http://www.w3.org/XML/1998/namespace}id'
+
+DOCUMENTS = {
+    'xlink': '''<mei xmlns="http://www.music-encoding.org/ns/mei"
+        xmlns:xlink="http://www.w3.org/1999/xlink" meiversion="5.1">
+        <meiHead><ptr xlink:href="a?b=1&amp;c=2"/></meiHead>
+        <music><section xmlns:foo="urn:foo"><measure n="1"/></section></music></mei>''',
+    'escaping': '''<mei xmlns="http://www.music-encoding.org/ns/mei">
+        <meiHead><title type="q&quot;&#10;&#9;&lt;&gt;">A &amp; B &lt;c&gt;&#13;</title>
+        <!-- a comment --><?pi data?></meiHead>
+        <!-- top level --><music><syl>  </syl><p>one <rend>two</rend> three</p></music></mei>''',
+    'non_ascii': '''<mei xmlns="http://www.music-encoding.org/ns/mei" xml:id="m-9">
+        <meiHead><title label="Così">Così sol d’una “chiara” fonte</title></meiHead></mei>''',
+    'foreign_default': '''<mei xmlns="http://www.music-encoding.org/ns/mei">
+        <music><annot><div xmlns="http://www.w3.org/1999/xhtml">hi <b>there</b></div></annot></music></mei>''',
+    'empty': '<mei xmlns="http://www.music-encoding.org/ns/mei"/>',
+}
+
+
+def _old_save_path(root):
+    """The serialize / re-parse / strip / indent steps write_mei() replaced."""
+    reparsed = etree.fromstring(etree.tostring(root),
+                                etree.XMLParser(remove_blank_text=True))
+    new_root = etree.Element('mei', nsmap={None: MEI_NS},
+                             attrib={'meiversion': root.get('meiversion', '4.0.0'),
+                                     XML_ID: root.get(XML_ID, 'm-1')})
+    for child in reparsed:
+        new_root.append(child)
+    for element in new_root.iter():
+        if element is not new_root and isinstance(element.tag, str) and '}' in element.tag:
+            element.tag = element.tag.split('}', 1)[1]
+    etree.indent(new_root, space='    ')
+    return etree.tostring(new_root, pretty_print=True, encoding='utf-8',
+                          xml_declaration=True)
+
+
+@pytest.mark.parametrize('name', sorted(DOCUMENTS))
+def test_write_mei_matches_old_save_path(name, tmp_path):
+    root = etree.fromstring(DOCUMENTS[name].encode('utf-8'))
+    path = str(tmp_path / 'out.mei')
+    write_mei(root, path)
+    with open(path, 'rb') as fh:
+        assert fh.read() == _old_save_path(root)
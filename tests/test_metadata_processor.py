@@ -0,0 +1,50 @@
+"""MEI_Metadata_Updater.apply_metadata() returns a File_Update_Result."""
+
+import os
+
+from mei_tools.mei_metadata_processor import MEI_Metadata_Updater
+
+SCORE = '''<?xml version="1.0" encoding="UTF-8"?>
+<mei xmlns="http://www.music-encoding.org/ns/mei" meiversion="5.1">
+<meiHead><fileDesc><titleStmt><title>Missa</title></titleStmt><pubStmt/></fileDesc></meiHead>
+<music><body><mdiv><score><section><measure n="1"/></section></score></mdiv></body></music>
+</mei>
+'''
+
+COLUMNS = ('Composer_Name', 'Composer_VIAF', 'Copyright_Owner', 'Editor', 'Genre',
+           'Publisher_1_VIAF', 'Publisher_2_VIAF', 'Rights_Statement', 'Source_Date',
+           'Source_Institution', 'Source_Location', 'Source_Publisher_1',
+           'Source_Publisher_2', 'Source_Shelfmark', 'Source_Title')
+ROW = dict({column: '' for column in COLUMNS},
+           MEI_Name='CRIM_Model_0001.mei', Title='Missa Sancta', Editor='Richard Freedman')
+
+
+def _write(folder, name, text):
+    path = os.path.join(folder, name)
+    with open(path, 'w', encoding='utf-8') as fh:
+        fh.write(text)
+    return path
+
+
+def test_updated_then_unchanged(tmp_path):
+    path = _write(str(tmp_path), 'CRIM_Model_0001.mei', SCORE)
+    out = str(tmp_path / 'out')
+    os.makedirs(out)
+    updater = MEI_Metadata_Updater(log_level=None, skip_unchanged=True)
+
+    result = updater.apply_metadata(path, ROW, out)
+    assert (result.status, result.error) == ('updated', None)
+    assert result.output_path == os.path.join(out, 'CRIM_Model_0001_rev.mei')
+    with open(result.output_path, encoding='utf-8') as fh:
+        assert 'Missa Sancta' in fh.read()
+
+    again = updater.apply_metadata(path, ROW, out)
+    assert (again.status, again.output_path) == ('unchanged', None)
+
+
+def test_parse_error_is_a_failed_result(tmp_path):
+    path = _write(str(tmp_path), 'broken.mei', '<mei><meiHead>')
+    result = MEI_Metadata_Updater(log_level=None).apply_metadata(path, ROW, str(tmp_path))
+    assert result.status == 'failed'
+    assert result.error.startswith(f'Error parsing {path}')
+    assert result.output_path is None
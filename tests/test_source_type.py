@@ -0,0 +1,25 @@
+"""sniff_source_type() gives the extractor's answer even for long headers."""
+
+from mei_tools.mei_reader import parse_mei
+from mei_tools.mei_source_type import detect_source_type, sniff_source_type
+
+# A Humdrum-derived header whose only marker (extMeta) comes late
+HUMDRUM = '''<?xml version="1.0" encoding="UTF-8"?>
+<mei xmlns="http://www.music-encoding.org/ns/mei" meiversion="5.1">
+<meiHead>
+<fileDesc><titleStmt><title>Missa</title></titleStmt>
+<notesStmt>{notes}</notesStmt></fileDesc>
+<extMeta><frames xmlns="http://www.humdrum.org/ns/humxml"><metaFrame n="1"/></frames></extMeta>
+</meiHead>
+<music><body><mdiv><score><section><measure n="1"/></section></score></mdiv></body></music>
+</mei>
+'''
+
+
+def test_header_longer_than_the_sniffed_bytes(tmp_path):
+    path = str(tmp_path / 'missa.mei')
+    with open(path, 'w', encoding='utf-8') as fh:
+        fh.write(HUMDRUM.format(notes='<annot>note</annot>' * 200))
+    assert detect_source_type(parse_mei(path)) == 'humdrum'
+    assert sniff_source_type(path, limit=1024) == 'humdrum'
+    assert sniff_source_type(path) == 'humdrum'
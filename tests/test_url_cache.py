@@ -0,0 +1,106 @@
+"""URL_Cache downloads, revalidates and falls back against a local server."""
+
+import threading
+import urllib.error
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from mei_tools.mei_url_cache import URL_Cache
+
+BODY = b'title,composer\nMissa,Anon\n'
+ETAG = '"v1"'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Requests seen, and the status each path answers with
+    seen = []
+    status = {'/sheet.csv': 200, '/missing.csv': 404, '/broken.csv': 200}
+
+    def do_GET(self):
+        _Handler.seen.append((self.path, self.headers.get('If-None-Match')))
+        status = _Handler.status[self.path]
+        if status == 200 and self.headers.get('If-None-Match') == ETAG:
+            status = 304
+        self.send_response(status)
+        if status == 200:
+            self.send_header('ETag', ETAG)
+            self.send_header('Content-Length', str(len(BODY)))
+            self.end_headers()
+            self.wfile.write(BODY)
+        else:
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.seen = []
+    httpd = HTTPServer(('127.0.0.1', 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _url(httpd, path):
+    return f'http://127.0.0.1:{httpd.server_port}{path}'
+
+
+def _read(path):
+    with open(path, 'rb') as fh:
+        return fh.read()
+
+
+def test_download_then_ttl_hit(server, tmp_path):
+    cache = URL_Cache(str(tmp_path), ttl=600)
+    url = _url(server, '/sheet.csv')
+    assert _read(cache.fetch(url)) == BODY
+    assert cache.last_status == 'downloaded'
+    assert _read(cache.fetch(url)) == BODY
+    assert cache.last_status == 'fresh'
+    assert len(_Handler.seen) == 1
+
+
+def test_revalidation_not_modified(server, tmp_path):
+    cache = URL_Cache(str(tmp_path), ttl=0)
+    url = _url(server, '/sheet.csv')
+    cache.fetch(url)
+    assert _read(cache.fetch(url)) == BODY
+    assert cache.last_status == 'not_modified'
+    assert _Handler.seen[-1] == ('/sheet.csv', ETAG)
+
+
+def test_offline_falls_back_to_cached_copy(server, tmp_path):
+    cache = URL_Cache(str(tmp_path), ttl=0, timeout=5)
+    url = _url(server, '/sheet.csv')
+    cache.fetch(url)
+    server.shutdown()
+    server.server_close()
+    assert _read(cache.fetch(url)) == BODY
+    assert cache.last_status == 'offline'
+
+
+def test_server_error_falls_back(server, tmp_path, monkeypatch):
+    cache = URL_Cache(str(tmp_path), ttl=0)
+    url = _url(server, '/broken.csv')
+    cache.fetch(url)
+    monkeypatch.setitem(_Handler.status, '/broken.csv', 503)
+    assert _read(cache.fetch(url)) == BODY
+    assert cache.last_status == 'offline'
+
+
+def test_client_error_is_raised(server, tmp_path, monkeypatch):
+    cache = URL_Cache(str(tmp_path), ttl=0)
+    url = _url(server, '/sheet.csv')
+    cache.fetch(url)
+    monkeypatch.setitem(_Handler.status, '/sheet.csv', 404)
+    with pytest.raises(urllib.error.HTTPError) as excinfo:
+        cache.fetch(url)
+    assert excinfo.value.code == 404
+    with pytest.raises(urllib.error.HTTPError):
+        cache.fetch(_url(server, '/missing.csv'))